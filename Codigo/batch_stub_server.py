@@ -0,0 +1,277 @@
+"""
+Servidor local que imita a API da OpenAI (Batch API e chat completions) para testes offline.
+
+Implementa /v1/files, /v1/files/{id}/content, /v1/batches, /v1/batches/{id},
+/v1/batches/{id}/cancel e /v1/chat/completions. As respostas são objetos JSON
+válidos gerados a partir do schema pedido (`response_format` do tipo json_schema)
+ou, na sua ausência, do schema de `Decision`, com escolhas determinísticas por pedido.
+Os pedidos de um lote são processados um a um ao longo de `--batch-delay` segundos;
+ao cancelar um lote, as respostas já geradas ficam no seu arquivo de saída.
+Com `--invalid-rate`, uma fração das respostas traz uma ação inexistente, para
+exercitar a validação e a autocorreção de cada agente; `--chat-invalid-rate` define
+uma fração diferente para os pedidos individuais (ex.: 0 para que a autocorreção tenha êxito).
+
+Uso:
+    python batch_stub_server.py --port 8765
+    # e em config/simulation_config.py:
+    #   BATCH_CONFIG["enabled"] = True
+    #   BATCH_CONFIG["base_urls"] = {"openai": "http://127.0.0.1:8765/v1"}
+    # (as chaves de API podem ter qualquer valor)
+"""
+import argparse
+import hashlib
+import json
+import re
+import threading
+import time
+import uuid
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from core.models import Decision
+
+PLACEHOLDER_TEXT = "Resposta gerada pelo servidor local de testes da Batch API."
+
+
+def instance_from_schema(schema: dict, seed: str, root: dict | None = None) -> object:
+    """Gera um valor válido para um JSON schema (subconjunto usado pelos modelos Pydantic do projeto)."""
+    root = root or schema
+    if "$ref" in schema:
+        name = schema["$ref"].split("/")[-1]
+        return instance_from_schema(root.get("$defs", {})[name], seed, root)
+    if "enum" in schema:
+        digest = int(hashlib.sha1(seed.encode("utf-8")).hexdigest(), 16)
+        return schema["enum"][digest % len(schema["enum"])]
+    if "const" in schema:
+        return schema["const"]
+    for key in ("anyOf", "oneOf"):
+        if key in schema:
+            options = [s for s in schema[key] if s.get("type") != "null"] or schema[key]
+            return instance_from_schema(options[0], seed, root)
+
+    schema_type = schema.get("type")
+    if schema_type == "object":
+        return {
+            name: instance_from_schema(prop, f"{seed}/{name}", root)
+            for name, prop in schema.get("properties", {}).items()
+        }
+    if schema_type == "array":
+        return [instance_from_schema(schema.get("items", {}), f"{seed}/0", root)]
+    if schema_type == "integer":
+        return int(schema.get("minimum", 0))
+    if schema_type == "number":
+        return float(schema.get("minimum", 0))
+    if schema_type == "boolean":
+        return True
+    return PLACEHOLDER_TEXT
+
+
+class StubState:
+    """Arquivos e lotes guardados em memória."""
+    def __init__(self, invalid_rate: float = 0.0, batch_delay: float = 0.0, chat_invalid_rate: float | None = None):
+        self.files = {}
+        self.batches = {}
+        self.outputs = {}
+        self.invalid_rate = invalid_rate
+        self.chat_invalid_rate = invalid_rate if chat_invalid_rate is None else chat_invalid_rate
+        self.batch_delay = batch_delay
+        self.chat_requests = 0
+        self.lock = threading.Lock()
+
+    def chat_completion(self, body: dict, seed: str, invalid_rate: float | None = None) -> dict:
+        """Resposta no formato de /v1/chat/completions para o corpo de pedido fornecido."""
+        invalid_rate = self.invalid_rate if invalid_rate is None else invalid_rate
+        response_format = body.get("response_format") or {}
+        schema = (response_format.get("json_schema") or {}).get("schema") or Decision.model_json_schema()
+        seed = seed + json.dumps(body.get("messages", []), ensure_ascii=False)
+        content = instance_from_schema(schema, seed)
+
+        digest = int(hashlib.sha1(("invalid" + seed).encode("utf-8")).hexdigest(), 16)
+        if isinstance(content, dict) and "action_primary" in content and (digest % 1000) < invalid_rate * 1000:
+            content["action_primary"] = "ação inexistente"
+
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": json.dumps(content, ensure_ascii=False)},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    def process_batch(self, batch_id: str):
+        """Processa os pedidos de um lote um a um ao longo de `batch_delay` segundos (chamado numa thread)."""
+        with self.lock:
+            batch = self.batches[batch_id]
+            lines = [line for line in self.files[batch["input_file_id"]]["content"].decode("utf-8").splitlines() if line.strip()]
+
+        for line in lines:
+            time.sleep(self.batch_delay / max(len(lines), 1))
+            request = json.loads(line)
+            result = {
+                "id": f"batch_req_{uuid.uuid4().hex[:12]}",
+                "custom_id": request["custom_id"],
+                "response": {"status_code": 200, "body": self.chat_completion(request["body"], request["custom_id"])},
+                "error": None,
+            }
+            with self.lock:
+                if batch["status"] != "in_progress":
+                    return
+                self.outputs[batch_id].append(result)
+
+        with self.lock:
+            if batch["status"] == "in_progress":
+                self.finish_batch(batch_id, "completed")
+
+    def finish_batch(self, batch_id: str, status: str):
+        """Grava o arquivo de saída com os pedidos já processados (todos ou, se cancelado, os parciais)."""
+        batch, output = self.batches[batch_id], self.outputs[batch_id]
+        batch.update({
+            "status": status,
+            "output_file_id": self.add_file(
+                "\n".join(json.dumps(o, ensure_ascii=False) for o in output).encode("utf-8"), "batch_output"
+            ) if output else None,
+            f"{status}_at": int(time.time()),
+            "request_counts": {"total": batch["request_counts"]["total"], "completed": len(output), "failed": 0},
+        })
+
+    def add_file(self, content: bytes, purpose: str) -> str:
+        file_id = f"file-{uuid.uuid4().hex[:12]}"
+        self.files[file_id] = {"content": content, "purpose": purpose, "created_at": int(time.time())}
+        return file_id
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    state: StubState = None
+
+    def log_message(self, fmt, *args):
+        print(f"   [stub] {self.command} {self.path} -> {fmt % args}")
+
+    def _send_json(self, payload: dict, status: int = 200):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _not_found(self):
+        self._send_json({"error": {"message": f"Rota desconhecida: {self.path}"}}, status=404)
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _batch_view(self, batch_id: str):
+        batch = self.state.batches.get(batch_id)
+        return self._send_json(batch) if batch else self._not_found()
+
+    def do_GET(self):
+        if match := re.fullmatch(r"/v1/files/([\w-]+)/content", self.path):
+            stored = self.state.files.get(match.group(1))
+            if not stored:
+                return self._not_found()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/jsonl")
+            self.send_header("Content-Length", str(len(stored["content"])))
+            self.end_headers()
+            self.wfile.write(stored["content"])
+        elif match := re.fullmatch(r"/v1/batches/([\w-]+)", self.path):
+            with self.state.lock:
+                self._batch_view(match.group(1))
+        else:
+            self._not_found()
+
+    def do_POST(self):
+        if self.path == "/v1/files":
+            message = BytesParser(policy=default_policy).parsebytes(
+                f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode("latin-1") + self._body()
+            )
+            fields = {part.get_param("name", header="content-disposition"): part.get_payload(decode=True)
+                      for part in message.iter_parts()}
+            purpose = (fields.get("purpose") or b"batch").decode("utf-8")
+            with self.state.lock:
+                file_id = self.state.add_file(fields["file"], purpose)
+            self._send_json({"id": file_id, "object": "file", "purpose": purpose, "bytes": len(fields["file"])})
+
+        elif self.path == "/v1/batches":
+            request = json.loads(self._body())
+            batch_id = f"batch_{uuid.uuid4().hex[:12]}"
+            batch = {
+                "id": batch_id,
+                "object": "batch",
+                "endpoint": request["endpoint"],
+                "input_file_id": request["input_file_id"],
+                "completion_window": request.get("completion_window", "24h"),
+                "status": "in_progress",
+                "output_file_id": None,
+                "error_file_id": None,
+                "created_at": int(time.time()),
+            }
+            with self.state.lock:
+                input_file = self.state.files.get(request["input_file_id"])
+                if not input_file:
+                    return self._send_json({"error": {"message": "Arquivo de entrada desconhecido."}}, status=400)
+                total = sum(1 for line in input_file["content"].decode("utf-8").splitlines() if line.strip())
+                batch["request_counts"] = {"total": total, "completed": 0, "failed": 0}
+                self.state.batches[batch_id] = batch
+                self.state.outputs[batch_id] = []
+                self._send_json(batch)
+            threading.Thread(target=self.state.process_batch, args=(batch_id,), daemon=True).start()
+
+        elif match := re.fullmatch(r"/v1/batches/([\w-]+)/cancel", self.path):
+            with self.state.lock:
+                batch = self.state.batches.get(match.group(1))
+                if batch and batch["status"] == "in_progress":
+                    self.state.finish_batch(batch["id"], "cancelled")
+                self._batch_view(match.group(1))
+
+        elif self.path == "/v1/chat/completions":
+            with self.state.lock:
+                self.state.chat_requests += 1
+            self._send_json(self.state.chat_completion(
+                json.loads(self._body()), seed=uuid.uuid4().hex, invalid_rate=self.state.chat_invalid_rate
+            ))
+
+        else:
+            self._not_found()
+
+
+def serve(
+    host: str = "127.0.0.1", port: int = 8765, invalid_rate: float = 0.0, batch_delay: float = 0.0,
+    chat_invalid_rate: float | None = None,
+) -> ThreadingHTTPServer:
+    """
+    Cria o servidor (sem o iniciar); use `serve_forever()` ou uma thread para o executar.
+    O estado em memória fica acessível em `server.RequestHandlerClass.state`.
+    """
+    handler = type("BoundStubHandler", (StubHandler,), {"state": StubState(invalid_rate, batch_delay, chat_invalid_rate)})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--invalid-rate", type=float, default=0.0, help="Fração de respostas com uma ação inválida.")
+    parser.add_argument("--chat-invalid-rate", type=float, default=None,
+                        help="Fração de respostas inválidas nos pedidos individuais (padrão: --invalid-rate).")
+    parser.add_argument("--batch-delay", type=float, default=0.0, help="Segundos até um lote ficar concluído.")
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, args.invalid_rate, args.batch_delay, args.chat_invalid_rate)
+    print(f"🧪 Servidor de testes da Batch API em http://{args.host}:{args.port}/v1 (Ctrl+C para terminar)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Compara os backends de embedding (PyTorch vs. ONNX fp32 vs. ONNX int8).
+
+Cada backend é executado num processo separado, para que a memória residente (RSS)
+medida reflita apenas as bibliotecas que ele carrega. O relatório mostra o tempo de
+carregamento, o débito (textos por segundo), o pico de RSS e a paridade da
+recuperação em relação ao primeiro backend da lista (recall@k dos mesmos trechos
+e similaridade de cosseno média dos vetores das consultas).
+
+Uso:
+    python benchmark_embeddings.py
+    python benchmark_embeddings.py --backends huggingface onnx-int8 --k 4 --min-recall 0.9
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import get_args
+
+import numpy as np
+
+from core.models import MILITARY_ACTIONS, DIPLOMATIC_ACTIONS
+
+
+def _flatten_strings(value) -> list:
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, dict):
+        return [s for v in value.values() for s in _flatten_strings(v)]
+    if isinstance(value, list):
+        return [s for v in value for s in _flatten_strings(v)]
+    return []
+
+
+def load_corpus(pdf_path: str = "data/manual_ri.pdf") -> list:
+    """Fragmentos do manual do Juiz ou, na sua ausência, os textos dos cenários."""
+    if os.path.exists(pdf_path):
+        from langchain_community.document_loaders import PyPDFLoader
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+        from config.rag_config import JUDGE_RETRIEVAL_CONFIG
+
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=JUDGE_RETRIEVAL_CONFIG["chunk_size"], chunk_overlap=JUDGE_RETRIEVAL_CONFIG["chunk_overlap"]
+        )
+        return [d.page_content for d in splitter.split_documents(PyPDFLoader(pdf_path).load())]
+
+    with open("data/cenarios.json", "r", encoding="utf-8") as f:
+        return [s for s in _flatten_strings(json.load(f)) if len(s) > 40]
+
+
+def run_worker(backend: str, output_dir: str, k: int):
+    """Executa um único backend e grava as métricas e os vetores das consultas em `output_dir`."""
+    from core.embeddings import build_embeddings
+
+    corpus = load_corpus()
+    queries = list(get_args(MILITARY_ACTIONS)) + list(get_args(DIPLOMATIC_ACTIONS))
+
+    start = time.perf_counter()
+    embeddings = build_embeddings({"backend": backend})
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    doc_vectors = np.asarray(embeddings.embed_documents(corpus), dtype=np.float32)
+    embed_seconds = time.perf_counter() - start
+
+    query_vectors = np.asarray([embeddings.embed_query(q) for q in queries], dtype=np.float32)
+    top_k = np.argsort(-(query_vectors @ doc_vectors.T), axis=1)[:, :k]
+
+    np.save(os.path.join(output_dir, f"{backend}_queries.npy"), query_vectors)
+    with open(os.path.join(output_dir, f"{backend}.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "load_seconds": load_seconds,
+            "texts_per_second": len(corpus) / embed_seconds if embed_seconds else float("inf"),
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "corpus_size": len(corpus),
+            "top_k": top_k.tolist(),
+        }, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["huggingface", "onnx", "onnx-int8"],
+                        help="Backends a comparar; o primeiro é a referência de paridade.")
+    parser.add_argument("--k", type=int, default=4, help="Número de trechos recuperados por consulta.")
+    parser.add_argument("--min-recall", type=float, default=0.9, help="Recall@k mínimo para considerar a paridade aceitável.")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--output-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.output_dir, args.k)
+        return
+
+    results = {}
+    with tempfile.TemporaryDirectory() as output_dir:
+        for backend in args.backends:
+            print(f"⏱️  A medir o backend '{backend}'...")
+            completed = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--worker", backend, "--output-dir", output_dir, "--k", str(args.k)]
+            )
+            if completed.returncode != 0:
+                print(f"   ❌ O backend '{backend}' falhou (código {completed.returncode}).")
+                continue
+            with open(os.path.join(output_dir, f"{backend}.json"), encoding="utf-8") as f:
+                results[backend] = json.load(f)
+            results[backend]["queries"] = np.load(os.path.join(output_dir, f"{backend}_queries.npy"))
+
+    if not results:
+        sys.exit(1)
+
+    reference = args.backends[0] if args.backends[0] in results else next(iter(results))
+    ref_top_k = np.asarray(results[reference]["top_k"])
+    ref_queries = results[reference]["queries"]
+    print(f"\nCorpus: {results[reference]['corpus_size']} textos | Referência de paridade: '{reference}'\n")
+    print(f"{'backend':<14}{'carga (s)':>10}{'textos/s':>12}{'RSS (MB)':>11}{'recall@k':>10}{'cosseno':>10}")
+
+    parity_ok = True
+    for backend, r in results.items():
+        top_k = np.asarray(r["top_k"])
+        recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(top_k, ref_top_k)])
+        cosine = float(np.mean(np.sum(r["queries"] * ref_queries, axis=1)))
+        parity_ok &= recall >= args.min_recall
+        print(f"{backend:<14}{r['load_seconds']:>10.2f}{r['texts_per_second']:>12.1f}{r['peak_rss_mb']:>11.0f}{recall:>10.3f}{cosine:>10.4f}")
+
+    print("\n✅ Paridade de recuperação dentro do limite." if parity_ok
+          else f"\n❌ Paridade abaixo do recall@k mínimo de {args.min_recall}.")
+    sys.exit(0 if parity_ok else 1)
+
+
+if __name__ == "__main__":
+    main()
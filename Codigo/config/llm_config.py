@@ -3,14 +3,18 @@
 # --------------------------------------------------------------------------------
 # Este arquivo centraliza a definição de todos os LLMs usados no projeto.
 # Os campos "provider" e "model" são usados pela função `build_llm` para instanciar 
-# o modelo correto.
+# o modelo correto. O campo opcional "temperature" substitui a temperatura padrão
+# (`DEFAULT_TEMPERATURE` em `core/llm_builder.py`) e é também o valor enviado nos
+# pedidos da Batch API.
 # --------------------------------------------------------------------------------
 
 LLM_CONFIG = {
     # Agente 1: OpenAI (GPT-5-MINI)
     "agente_openai_gpt": {
         "provider": "openai",
-        "model": "gpt-5-mini-2025-08-07"
+        "model": "gpt-5-mini-2025-08-07",
+        # Os modelos gpt-5 só aceitam a temperatura padrão (1)
+        "temperature": 1
     },
 
    # Agente 2: Llama 3 (70B) via Groq
@@ -42,4 +46,20 @@ LLM_CONFIG = {
         "provider": "openai",
         "model": "gpt-5-2025-08-07"
     }
-}
\ No newline at end of file
+}
+
+# --------------------------------------------------------------------------------
+# POOL DE CONEXÕES HTTP PARTILHADO
+# --------------------------------------------------------------------------------
+# Os clientes criados por `get_llm` partilham um único cliente httpx por provedor
+# (OpenAI, Groq, DeepSeek e xAI), reutilizando conexões keep-alive e handshakes TLS
+# entre agentes, cenários, Juiz e Analista.
+# --------------------------------------------------------------------------------
+
+HTTP_POOL_CONFIG = {
+    "max_connections": 100,
+    "max_keepalive_connections": 20,
+    "keepalive_expiry": 60.0,   # segundos que uma conexão ociosa permanece aberta
+    "timeout": 120.0,           # segundos por pedido
+    "http2": False,             # requer o pacote 'h2'
+}
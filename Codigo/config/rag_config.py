@@ -0,0 +1,58 @@
+# --------------------------------------------------------------------------------
+# CONFIGURAÇÃO DA RECUPERAÇÃO (RAG) DO JUIZ
+# --------------------------------------------------------------------------------
+# O contexto enviado ao Juiz combina trechos do manual pré-calculados para cada
+# `action_primary` possível com alguns trechos específicos da justificativa do ator.
+# Trechos sobrepostos são removidos e o total é limitado a um orçamento de tokens.
+# Os valores padrão resultam em cerca de metade dos tokens da recuperação original
+# (4 fragmentos de 1000 caracteres por avaliação).
+# --------------------------------------------------------------------------------
+
+JUDGE_RETRIEVAL_CONFIG = {
+    # Fragmentação do manual
+    "chunk_size": 600,
+    "chunk_overlap": 100,
+
+    # Trechos pré-calculados por ação (consultados uma única vez, na inicialização)
+    "action_k": 1,
+
+    # Trechos recuperados a partir da justificativa em cada avaliação; os que se sobrepõem
+    # aos trechos da ação são descartados (e não substituídos)
+    "justification_k": 2,
+
+    # Candidatos buscados no índice para os trechos de cada ação antes da remoção de sobreposições
+    "fetch_k": 8,
+
+    # Orçamento máximo de tokens para o bloco "MANUAL DE REFERÊNCIA". Os trechos da ação e da
+    # justificativa são intercalados e os que não couberem são descartados.
+    "context_token_budget": 600,
+
+    # Índice vetorial: "flat" (exato), "hnsw" (aproximado) ou "auto"
+    # ("auto" usa HNSW apenas quando o manual tem muitos fragmentos)
+    "index_type": "auto",
+    "approx_index_min_chunks": 5000,
+    "hnsw_m": 32,
+    "hnsw_ef_search": 64,
+}
+
+# --------------------------------------------------------------------------------
+# CONFIGURAÇÃO DO MODELO DE EMBEDDING
+# --------------------------------------------------------------------------------
+# Usado pelo Juiz (índice do manual) e pela memória vetorial dos agentes.
+# Backends disponíveis (ver `core/embeddings.py`):
+#   "huggingface" -> sentence-transformers sobre PyTorch
+#   "onnx"        -> mesmo modelo com ONNX Runtime (fp32), sem PyTorch
+#   "onnx-int8"   -> ONNX Runtime com pesos quantizados para int8
+# --------------------------------------------------------------------------------
+
+EMBEDDING_CONFIG = {
+    "backend": "huggingface",
+    "model_name": "sentence-transformers/all-MiniLM-L6-v2",
+
+    # Opções exclusivas dos backends ONNX
+    "onnx_file": "onnx/model.onnx",
+    "onnx_cache_dir": "data/.onnx_cache",
+    "batch_size": 32,
+    "max_length": 256,
+    "num_threads": None,
+}
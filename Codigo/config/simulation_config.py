@@ -0,0 +1,87 @@
+# --------------------------------------------------------------------------------
+# CONFIGURAÇÃO DA EXECUÇÃO DAS SIMULAÇÕES
+# --------------------------------------------------------------------------------
+
+SIMULATION_CONFIG = {
+    # Número de rodadas de cada cenário
+    "total_rounds": 20,
+
+    # Orçamento máximo de tokens do prompt de decisão de cada agente (None = sem limite).
+    # Quando excedido, as secções de menor prioridade são compactadas ou cortadas primeiro
+    # (ver `PromptAssembler` em `core/agent.py`). O texto fixo do template e as secções
+    # essenciais (objetivos, sinopse, perfil, linhas vermelhas, ...) nunca são cortados: um
+    # orçamento abaixo desse mínimo não é atingido e o prompt segue acima dele, com um aviso
+    # e "over_budget" em `prompt_token_usage`.
+    "agent_context_budget": 6000,
+}
+
+# --------------------------------------------------------------------------------
+# TÉRMINO ANTECIPADO POR CONVERGÊNCIA (opcional)
+# --------------------------------------------------------------------------------
+# Avaliado após a análise de cada rodada (ver `ConvergenceDetector` em
+# `core/convergence.py`). O motivo de paragem fica registado nos resultados e
+# `python convergence_report.py` compara as execuções interrompidas com as completas.
+# --------------------------------------------------------------------------------
+
+CONVERGENCE_CONFIG = {
+    "enabled": False,
+
+    # Nenhum critério é avaliado antes desta rodada
+    "min_rounds": 5,
+
+    # Mesmas ações por ator durante K rodadas seguidas (0 = desativado)
+    "repeat_rounds": 3,
+    "require_stable_escalation": True,
+
+    # Nível de escalada parado num nível absorvente durante K rodadas (0 = desativado)
+    "absorbing_levels": [0, 5],
+    "absorbing_rounds": 4,
+
+    # Distância de variação total entre janelas consecutivas de rodadas (None = desativado)
+    "distribution_window": 3,
+    "distribution_threshold": None,
+}
+
+# --------------------------------------------------------------------------------
+# DECISÕES EM LOTE (opcional)
+# --------------------------------------------------------------------------------
+# Agrupa, em cada rodada, os agentes que usam a mesma entrada do LLM_CONFIG e envia
+# os seus pedidos através da Batch API do provedor (ver `core/batching.py`).
+# Provedores sem Batch API, ou grupos menores que `min_group_size`, continuam a
+# usar pedidos individuais. Para testar offline, inicie `python batch_stub_server.py`
+# e aponte `base_urls` para ele (ex.: {"openai": "http://127.0.0.1:8765/v1"}).
+#
+# Custo em pedidos: um grupo de N agentes gasta 2 pedidos para submeter o lote (arquivo
+# e criação), uma consulta de estado por intervalo de espera e 1 a 2 descargas de
+# resultados, contra N pedidos individuais. O lote não reduz o número de pedidos HTTP
+# (só compensa em grupos grandes); o ganho está no preço por token (a Batch API da
+# OpenAI cobra metade) e em não consumir os limites de taxa dos pedidos síncronos.
+#
+# Custo em latência: a Batch API é assíncrona e os provedores só garantem a conclusão
+# dentro da janela de 24h. Cada rodada espera pelos seus lotes até `timeout` segundos;
+# os pedidos sem resposta nesse prazo são refeitos individualmente, acrescentando a
+# latência normal. Use-o com o servidor de testes ou em execuções que toleram rodadas
+# mais lentas; para simulações interativas, mantenha-o desativado.
+# --------------------------------------------------------------------------------
+
+BATCH_CONFIG = {
+    "enabled": False,
+    "min_group_size": 2,
+
+    # Espera pelos lotes (segundos): a primeira consulta ao estado é feita após `poll_interval`
+    # e o intervalo é multiplicado por `poll_backoff` até `max_poll_interval` (com os valores
+    # padrão, no máximo ~7 consultas por lote em 120s). Ao fim de `timeout`, os lotes ainda
+    # por terminar são cancelados: as respostas já geradas são aproveitadas e apenas os
+    # agentes sem resposta decidem individualmente.
+    "poll_interval": 2.0,
+    "poll_backoff": 2.0,
+    "max_poll_interval": 30.0,
+    "timeout": 120.0,
+
+    # "json_object" (suportado por todos os provedores com Batch API) ou "json_schema"
+    "response_format": "json_object",
+
+    # Substitui o endereço base da API de cada provedor (OpenAI e Groq), tanto para os lotes
+    # como para os pedidos individuais e a autocorreção dos agentes (ausente = endereço oficial)
+    "base_urls": {},
+}
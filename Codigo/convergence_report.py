@@ -0,0 +1,136 @@
+"""
+Relatório do término antecipado por convergência.
+
+Mostra quantas execuções terminaram antes da última rodada (e porquê), quantas chamadas
+de LLM foram poupadas e se as estatísticas de desfecho das execuções interrompidas
+diferem das execuções completas. A diferença de médias é acompanhada do erro padrão e de
+um intervalo de confiança bootstrap, reamostrando execuções inteiras dentro de cada grupo.
+
+As chamadas por rodada são estimadas como uma decisão e uma avaliação do Juiz por ator,
+mais uma análise da rodada; as tentativas de autocorreção não são contabilizadas.
+
+Uso:
+    python convergence_report.py
+    python convergence_report.py --results-dir outputs --by scenario_type
+    python convergence_report.py --n-boot 5000 --seed 42
+"""
+import argparse
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from core.analytics import ResultsAnalytics
+from core.convergence import STOP_MAX_ROUNDS
+
+OUTCOME_COLUMNS = ["final_escalation_level", "military_share", "council_participation_rate"]
+
+
+def _bootstrap_means(values: pd.DataFrame, n_boot: int, rng: np.random.Generator) -> np.ndarray:
+    """Médias de cada coluna em `n_boot` reamostragens das linhas (valores ausentes são ignorados)."""
+    data = values.to_numpy(dtype=float)
+    observed = ~np.isnan(data)
+    n = len(data)
+    weights = rng.multinomial(n, np.full(n, 1.0 / n), size=n_boot)
+    totals = weights @ np.where(observed, data, 0.0)
+    counts = weights @ observed.astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, totals / counts, np.nan)
+
+
+def bootstrap_difference(
+    early: pd.DataFrame,
+    full: pd.DataFrame,
+    n_boot: int = 2000,
+    confidence: float = 0.95,
+    seed: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Diferença de médias (interrompidas - completas) com erro padrão e intervalo bootstrap.
+
+    Cada execução é uma réplica independente; as execuções de cada grupo são reamostradas
+    separadamente, com todas as reamostragens calculadas de uma vez por produto matricial.
+
+    Returns:
+        pd.DataFrame: Colunas `difference`, `se`, `ci_low`, `ci_high`, `n_early` e `n_full` por desfecho.
+    """
+    rng = np.random.default_rng(seed)
+    differences = _bootstrap_means(early, n_boot, rng) - _bootstrap_means(full, n_boot, rng)
+    alpha = (1.0 - confidence) / 2.0
+    with np.errstate(invalid="ignore"):
+        return pd.DataFrame(
+            {
+                "difference": early.mean() - full.mean(),
+                "se": np.nanstd(differences, axis=0, ddof=1),
+                "ci_low": np.nanquantile(differences, alpha, axis=0),
+                "ci_high": np.nanquantile(differences, 1.0 - alpha, axis=0),
+                "n_early": early.notna().sum().to_numpy(),
+                "n_full": full.notna().sum().to_numpy(),
+            },
+            index=early.columns,
+        )
+
+
+def build_report(runs: pd.DataFrame, n_boot: int = 2000, seed: Optional[int] = None) -> dict:
+    """Calcula as chamadas poupadas e a comparação de desfechos a partir de `ResultsAnalytics.run_summary()`."""
+    runs = runs.copy()
+    runs["early_stopped"] = runs["stop_reason"] != STOP_MAX_ROUNDS
+    runs["calls_per_round"] = 2 * runs["n_actors"] + 1
+    runs["calls_made"] = runs["rounds_played"] * runs["calls_per_round"]
+    runs["calls_saved"] = (runs["total_rounds"] - runs["rounds_played"]) * runs["calls_per_round"]
+
+    reasons = runs.groupby("stop_reason").agg(
+        runs=("stop_reason", "size"),
+        mean_rounds_played=("rounds_played", "mean"),
+        calls_saved=("calls_saved", "sum"),
+    )
+
+    outcome_columns = OUTCOME_COLUMNS + [c for c in runs.columns if c.startswith("verdict_share_")]
+    outcomes = runs.groupby("early_stopped")[outcome_columns].agg(["mean", "std", "count"]).T.unstack()
+    means = runs.groupby("early_stopped")[outcome_columns].mean().T
+    if True in means.columns and False in means.columns:
+        stopped = runs["early_stopped"]
+        means = means.join(bootstrap_difference(
+            runs.loc[stopped, outcome_columns], runs.loc[~stopped, outcome_columns], n_boot=n_boot, seed=seed
+        ))
+
+    return {"runs": runs, "reasons": reasons, "outcomes": outcomes, "means": means}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--results-dir", default="outputs", help="Pasta com os CSVs de resultados.")
+    parser.add_argument("--by", choices=["scenario_type", "scenario_id"], help="Repete a comparação de desfechos por grupo.")
+    parser.add_argument("--n-boot", type=int, default=2000, help="Reamostragens bootstrap da diferença de médias.")
+    parser.add_argument("--seed", type=int, default=None, help="Semente do bootstrap.")
+    args = parser.parse_args()
+
+    runs = ResultsAnalytics(args.results_dir).run_summary()
+    if runs.empty:
+        print(f"❌ Nenhum arquivo de resultados encontrado em '{args.results_dir}'.")
+        return
+
+    report = build_report(runs, n_boot=args.n_boot, seed=args.seed)
+    runs = report["runs"]
+    calls_made, calls_saved = runs["calls_made"].sum(), runs["calls_saved"].sum()
+
+    print(f"\n📊 {len(runs)} execuções | {runs['early_stopped'].sum()} terminadas antecipadamente")
+    print(f"   Chamadas de LLM feitas: {calls_made:.0f} | poupadas: {calls_saved:.0f} "
+          f"({calls_saved / (calls_made + calls_saved):.1%} do total sem término antecipado)")
+
+    print("\n# Motivos de paragem")
+    print(report["reasons"].to_string())
+
+    print("\n# Desfechos: execuções interrompidas (True) vs. completas (False), com IC 95% bootstrap da diferença")
+    print(report["means"].to_string(float_format=lambda v: f"{v:.3f}"))
+    print("\n# Dispersão por grupo")
+    print(report["outcomes"].to_string(float_format=lambda v: f"{v:.3f}"))
+
+    if args.by:
+        for group, group_runs in runs.groupby(args.by, dropna=False):
+            print(f"\n# {args.by} = {group}")
+            print(build_report(group_runs, n_boot=args.n_boot, seed=args.seed)["means"].to_string(float_format=lambda v: f"{v:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,17 @@
 import json
+from typing import Any
 
 from langchain.memory import VectorStoreRetrieverMemory
 from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import Runnable, RunnablePassthrough
-from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_core.runnables import Runnable
 from pydantic import ValidationError
 
 # Importa todos os modelos de dados e o nosso erro personalizado
-from .models import Decision, DecisionValidationError, FinalResolution
+from .models import Decision, DecisionValidationError
+from .tokens import count_tokens, truncate_to_tokens
+from config.simulation_config import SIMULATION_CONFIG
 
 # --- PROMPT PARA A DECISÃO DA RODADA ---
 AGENT_PROMPT = ChatPromptTemplate.from_messages(
@@ -43,7 +46,7 @@ Não adicione nenhum texto ou comentário fora do JSON.""",
 - **Nível de Escalada Atual:** Nível {escalation_level} (de 0 a 5).
 
 # SITUAÇÃO ATUAL
-- **Rodada Atual:** {round_number} de 20
+- **Rodada Atual:** {round_number} de {total_rounds}
 
 # SUA MISSÃO
 - Sua ação na última rodada foi: '{last_action}'. Repetir a mesma estratégia pode ser ineficaz.
@@ -84,10 +87,120 @@ Sua resposta deve conter APENAS o objeto JSON corrigido e válido, sem nenhum ou
 """
 )
 
+class PromptAssembler:
+    """
+    Monta as variáveis do AGENT_PROMPT dentro de um orçamento de tokens.
+
+    Os tokens são contados localmente para a família do modelo do agente. Se o prompt
+    exceder o orçamento, as secções são reduzidas por ordem crescente de prioridade
+    (ver REDUCTION_ORDER) até caber. Cada montagem devolve um relatório com os tokens
+    usados por secção e as reduções aplicadas.
+    """
+    # Ordem de redução: o schema é apenas compactado (sem perda); as memórias perdem
+    # primeiro as menos relevantes; os eventos perdem as últimas ações; os restantes
+    # textos são cortados.
+    REDUCTION_ORDER = [
+        "schema", "history", "situation_summary", "impact_analysis",
+        "historical_context", "internal_context", "capabilities",
+    ]
+    EMPTY_HISTORY = "Nenhuma memória relevante."
+
+    def __init__(self, model: str | None = None, context_budget: int | None = None):
+        self.model = model
+        self.context_budget = context_budget
+        self.template_tokens = self._count(self._render({v: "" for v in AGENT_PROMPT.input_variables}))
+
+    def _count(self, text: str) -> int:
+        return count_tokens(text, self.model)
+
+    @staticmethod
+    def _render(variables: dict) -> str:
+        return "\n".join(m.content for m in AGENT_PROMPT.format_messages(**variables))
+
+    def _usage(self, variables: dict) -> dict:
+        sections = {name: self._count(str(value)) for name, value in variables.items()}
+        return {"template": self.template_tokens, **sections}
+
+    def _reduce(self, section: str, variables: dict, memories: list[str], allowance: int) -> str:
+        """Devolve uma versão da secção com no máximo `allowance` tokens (exceto o schema, que só é compactado)."""
+        value = str(variables[section])
+        if section == "schema":
+            return json.dumps(json.loads(value), ensure_ascii=False, separators=(",", ":"))
+
+        if section == "history":
+            kept, used = [], 0
+            for memory in memories:
+                tokens = self._count(memory) + 1
+                if used + tokens > allowance:
+                    break
+                kept.append(memory)
+                used += tokens
+            return "\n".join(kept) if kept else self.EMPTY_HISTORY
+
+        if section == "situation_summary":
+            entries = value.split("; ")
+            kept = []
+            for entry in entries:
+                candidate = "; ".join(kept + [entry]) + f" (+{len(entries) - len(kept) - 1} ações omitidas)"
+                if self._count(candidate) > allowance:
+                    break
+                kept.append(entry)
+            if kept:
+                omitted = len(entries) - len(kept)
+                return "; ".join(kept) + (f" (+{omitted} ações omitidas)" if omitted else "")
+
+        marker = " [...]"
+        return truncate_to_tokens(value, allowance - self._count(marker), self.model) + marker
+
+    def assemble(self, variables: dict, memories: list[str]) -> tuple[dict, dict]:
+        """
+        Monta as variáveis finais do prompt.
+
+        Args:
+            variables (dict): Todas as variáveis do AGENT_PROMPT, exceto `history`.
+            memories (list[str]): Memórias recuperadas, da mais para a menos relevante.
+
+        Returns:
+            tuple[dict, dict]: As variáveis prontas para o AGENT_PROMPT e o relatório de uso,
+            com os tokens por secção, o total, o orçamento, as reduções aplicadas e se o
+            prompt ficou acima do orçamento (o texto fixo do template e as secções fora de
+            REDUCTION_ORDER, como os objetivos e as linhas vermelhas, nunca são reduzidos).
+        """
+        variables = {**variables, "history": "\n".join(memories) if memories else self.EMPTY_HISTORY}
+        usage = self._usage(variables)
+        reductions = []
+
+        if self.context_budget:
+            for section in self.REDUCTION_ORDER:
+                excess = sum(usage.values()) - self.context_budget
+                if excess <= 0:
+                    break
+                allowance = max(0, usage[section] - excess)
+                reduced = self._reduce(section, variables, memories, allowance)
+                if reduced != variables[section]:
+                    variables[section] = reduced
+                    usage[section] = self._count(reduced)
+                    reductions.append(section)
+
+        total = sum(usage.values())
+        over_budget = bool(self.context_budget) and total > self.context_budget
+        if over_budget:
+            print(f"   ⚠️  Prompt com {total} tokens mesmo após todas as reduções (orçamento: {self.context_budget}).")
+
+        report = {
+            "sections": usage,
+            "total": total,
+            "budget": self.context_budget,
+            "reductions": reductions,
+            "over_budget": over_budget,
+        }
+        return variables, report
+
 class StateAgent:
     """Representa um único ator com memória vetorial e capacidade de autocorreção."""
     def __init__(
-    self, llm: Runnable, actor_data: dict, role: str, embedding_model: HuggingFaceEmbeddings
+    self, llm: Runnable, actor_data: dict, role: str, embedding_model: Embeddings,
+    model_name: str | None = None, context_budget: int | None = SIMULATION_CONFIG["agent_context_budget"]
     ):
         """
         Inicializa o agente de estado.
@@ -96,7 +209,9 @@ class StateAgent:
             llm (Runnable): O modelo de linguagem a ser usado.
             actor_data (dict): Dados que definem o ator.
             role (str): O papel do ator no cenário.
-            embedding_model (HuggingFaceEmbeddings): O modelo para criar embeddings de texto.
+            embedding_model (Embeddings): O modelo para criar embeddings de texto.
+            model_name (str | None): Nome do modelo, usado para contar tokens localmente.
+            context_budget (int | None): Orçamento de tokens do prompt de decisão (None = sem limite).
         """
         self.llm = llm
         self.actor_data = actor_data
@@ -110,6 +225,11 @@ class StateAgent:
         elif hasattr(llm, "model_name"):
             self.llm_config = {"provider": "desconhecido", "model": llm.model_name}
 
+        self.prompt_assembler = PromptAssembler(
+            model=model_name or self.llm_config.get("model"), context_budget=context_budget
+        )
+        self.last_prompt_usage = None
+
         # Configura a memória vetorial para o agente
         vectorstore = FAISS.from_texts(
             texts=["Início do registo de memória."], embedding=embedding_model
@@ -122,6 +242,69 @@ class StateAgent:
             memory_key="history",
         )
 
+    def prepare_decision(
+        self,
+        synopsis: str,
+        situation_summary: str,
+        round_number: int,
+        last_action: str | None,
+        impact_analysis: str,
+        escalation_level: int,
+        total_rounds: int = SIMULATION_CONFIG["total_rounds"],
+    ) -> tuple[dict, dict]:
+        """
+        Recupera as memórias relevantes e monta as variáveis do AGENT_PROMPT dentro do orçamento.
+
+        Os argumentos são os mesmos de `decide`.
+
+        Returns:
+            tuple[dict, dict]: As variáveis do prompt e o contexto a passar a `complete_decision`.
+        """
+        objectives = self.actor_data.get(
+            "objectives", "Agir conforme o perfil ideológico."
+        )
+        red_lines = self.actor_data.get("alliances", {}).get(
+            "red_lines", "Nenhuma definida."
+        )
+
+        situation_summary_text = situation_summary or "Nenhuma ação foi tomada ainda."
+        # Memórias recuperadas da mais para a menos relevante
+        memories = [
+            doc.page_content for doc in self.memory.retriever.invoke(situation_summary_text)
+        ]
+
+        prompt_variables, self.last_prompt_usage = self.prompt_assembler.assemble(
+            {
+                "objectives": objectives,
+                "actor_name": self.name,
+                "synopsis": synopsis,
+                "actor_role": self.role,
+                "ideological_profile": self.actor_data.get("ideological_profile"),
+                "historical_context": json.dumps(self.actor_data.get("historical_context", {})),
+                "internal_context": json.dumps(self.actor_data.get("internal_context", {})),
+                "capabilities": json.dumps(self.actor_data.get("capabilities", {})),
+                "red_lines": red_lines,
+                "round_number": round_number,
+                "total_rounds": total_rounds,
+                "situation_summary": situation_summary_text,
+                "last_action": last_action or "Nenhuma (esta é a primeira rodada)",
+                "impact_analysis": impact_analysis,
+                "escalation_level": escalation_level,
+                "schema": json.dumps(Decision.model_json_schema(), ensure_ascii=False, indent=2),
+            },
+            memories,
+        )
+        usage = self.last_prompt_usage
+        reduced = f" | reduzido: {', '.join(usage['reductions'])}" if usage["reductions"] else ""
+        print(f"  -> Prompt de '{self.name}': {usage['total']} tokens (orçamento: {usage['budget']}){reduced}")
+
+        context = {
+            "round_number": round_number,
+            "objectives": objectives,
+            "situation_summary": situation_summary,
+        }
+        return prompt_variables, context
+
     def decide(
         self,
         synopsis: str,
@@ -130,6 +313,7 @@ class StateAgent:
         last_action: str | None,
         impact_analysis: str,
         escalation_level: int,
+        total_rounds: int = SIMULATION_CONFIG["total_rounds"],
     ) -> Decision:
         """
         Processa o contexto e invoca o LLM para decidir, com um loop de autocorreção.
@@ -141,6 +325,7 @@ class StateAgent:
             last_action (str | None): A última ação tomada por este agente.
             impact_analysis (str): Análise do impacto da última rodada.
             escalation_level (int): O nível de escalada atual.
+            total_rounds (int): O número total de rodadas do cenário.
 
         Returns:
             Decision: Um objeto de decisão validado.
@@ -150,47 +335,49 @@ class StateAgent:
         """
         print(f"\n🤖 Invocando agente: {self.name} (Papel: {self.role})")
 
+        prompt_variables, context = self.prepare_decision(
+            synopsis=synopsis,
+            situation_summary=situation_summary,
+            round_number=round_number,
+            last_action=last_action,
+            impact_analysis=impact_analysis,
+            escalation_level=escalation_level,
+            total_rounds=total_rounds,
+        )
+        try:
+            response_data = (AGENT_PROMPT | self.llm).invoke(prompt_variables)
+        except ValidationError as e:
+            # O parser estruturado já rejeitou a saída; a autocorreção parte deste erro
+            return self.complete_decision(None, context, validation_error=e)
+        return self.complete_decision(response_data, context)
+
+    def complete_decision(self, response_data: Any, context: dict, validation_error: ValidationError | None = None) -> Decision:
+        """
+        Valida a resposta do LLM (com autocorreção) e guarda a decisão na memória do agente.
+
+        Args:
+            response_data (Any): A saída do LLM para o prompt de `prepare_decision`
+                (dicionário, objeto Pydantic ou texto).
+            context (dict): O contexto devolvido por `prepare_decision`.
+            validation_error (ValidationError | None): Erro já produzido ao obter a resposta,
+                que passa diretamente à autocorreção.
+
+        Returns:
+            Decision: Um objeto de decisão validado.
+
+        Raises:
+            DecisionValidationError: Se o agente não conseguir produzir uma saída válida.
+        """
         max_attempts = 2
-        response_data = None
+        round_number = context["round_number"]
+        objectives = context["objectives"]
+        situation_summary = context["situation_summary"]
 
         for attempt in range(max_attempts):
             try:
-                # Na primeira tentativa, usa o prompt normal
-                if attempt == 0:
-                    chain = (
-                        RunnablePassthrough.assign(
-                            history=self.memory.load_memory_variables
-                        )
-                        | AGENT_PROMPT
-                        | self.llm
-                    )
-
-                    objectives = self.actor_data.get(
-                        "objectives", "Agir conforme o perfil ideológico."
-                    )
-                    red_lines = self.actor_data.get("alliances", {}).get(
-                        "red_lines", "Nenhuma definida."
-                    )
-
-                    response_data = chain.invoke(
-                        {
-                            "objectives": objectives,
-                            "actor_name": self.name,
-                            "synopsis": synopsis,
-                            "actor_role": self.role,
-                            "ideological_profile": self.actor_data.get("ideological_profile"),
-                            "historical_context": json.dumps(self.actor_data.get("historical_context", {})),
-                            "internal_context": json.dumps(self.actor_data.get("internal_context", {})),
-                            "capabilities": json.dumps(self.actor_data.get("capabilities", {})),
-                            "red_lines": red_lines,
-                            "round_number": round_number,
-                            "situation_summary": situation_summary or "Nenhuma ação foi tomada ainda.",
-                            "last_action": last_action or "Nenhuma (esta é a primeira rodada)",
-                            "impact_analysis": impact_analysis,
-                            "escalation_level": escalation_level,
-                            "schema": json.dumps(Decision.model_json_schema(), ensure_ascii=False, indent=2),
-                        }
-                    )
+                if validation_error is not None:
+                    pending_error, validation_error = validation_error, None
+                    raise pending_error
 
                 # Valida a resposta com o modelo Pydantic
                 decision = (
@@ -226,13 +413,17 @@ class StateAgent:
                     )
 
                     # Usa a saída defeituosa para tentar a correção
-                    response_data = correction_chain.invoke(
-                        {
-                            "validation_error": str(e),
-                            "faulty_output": faulty_output_str,
-                            "schema": json.dumps(Decision.model_json_schema(), ensure_ascii=False, indent=2),
-                        }
-                    )
+                    try:
+                        response_data = correction_chain.invoke(
+                            {
+                                "validation_error": str(e),
+                                "faulty_output": faulty_output_str,
+                                "schema": json.dumps(Decision.model_json_schema(), ensure_ascii=False, indent=2),
+                            }
+                        )
+                    except ValidationError as correction_error:
+                        # O parser estruturado rejeitou a correção; a tentativa seguinte parte deste erro
+                        response_data, validation_error = None, correction_error
                 else:
                     print(f"   ❌ Autocorreção falhou para '{self.name}'. A registar a falha definitiva.")
                     raise DecisionValidationError(message=str(e), raw_output=response_data)
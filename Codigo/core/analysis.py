@@ -5,7 +5,7 @@ from pydantic import BaseModel, Field
 from typing import Literal
 
 from .models import Decision 
-from .llm_builder import build_llm
+from .llm_builder import get_llm
 from config.llm_config import LLM_CONFIG
 
 class RoundAnalysis(BaseModel):
@@ -48,7 +48,7 @@ class AnalysisModule:
     def __init__(self):
         analyst_config = LLM_CONFIG.get("juiz") 
 
-        self.llm = build_llm(
+        self.llm = get_llm(
             provider=analyst_config["provider"],
             model=analyst_config["model"],
             structured_output_model=RoundAnalysis
@@ -0,0 +1,427 @@
+import glob
+import hashlib
+import os
+import pickle
+from typing import Dict, Iterable, Optional, Sequence, Tuple, get_args
+
+import numpy as np
+import pandas as pd
+
+from .models import MILITARY_ACTIONS, Verdict
+
+# Dimensões pelas quais todas as estatísticas podem ser agrupadas
+DIMENSIONS = ("llm_model", "actor_role", "scenario_type")
+
+# Colunas lidas dos CSVs de resultados. As colunas de texto livre
+# (justificativas e racionais do Juiz) não são necessárias para as estatísticas.
+_USED_COLUMNS = {
+    "scenario_id", "scenario_type", "round_number", "actor_name", "actor_role",
+    "llm_model", "action_primary", "council_participation", "judge_verdict",
+    "escalation_level", "stop_reason", "rounds_played", "total_rounds", "final_escalation_level",
+}
+
+_MILITARY_ACTIONS = set(get_args(MILITARY_ACTIONS))
+_VERDICTS = get_args(Verdict.model_fields["verdict"].annotation)
+
+_CACHE_VERSION = 2
+
+
+def _sum_counts(frames: Iterable[pd.DataFrame], keys: Sequence[str]) -> pd.DataFrame:
+    """Soma tabelas de contagem parciais que partilham as mesmas colunas-chave."""
+    frames = [f for f in frames if f is not None]
+    non_empty = [f for f in frames if not f.empty]
+    if not non_empty:
+        return frames[0].iloc[0:0] if frames else pd.DataFrame(columns=list(keys))
+    merged = pd.concat(non_empty, ignore_index=True)
+    return merged.groupby(list(keys), dropna=False, sort=True).sum(numeric_only=True).reset_index()
+
+
+def _compute_partials(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """
+    Reduz um único arquivo de resultados a tabelas de contagem aditivas.
+
+    Como todas as tabelas são contagens, os parciais de várias réplicas podem ser
+    somados sem voltar a ler os CSVs originais.
+    """
+    dims = list(DIMENSIONS)
+    for column in _USED_COLUMNS:
+        if column not in df.columns:
+            df[column] = np.nan
+
+    decisions = df[df["action_primary"].notna()].copy()
+    decisions["round_number"] = pd.to_numeric(decisions["round_number"], errors="coerce")
+
+    actions = (
+        decisions.groupby(dims + ["action_primary"], dropna=False)
+        .size().rename("count").reset_index()
+    )
+
+    # Transições de ação entre rodadas consecutivas do mesmo ator
+    ordered = decisions.sort_values(["actor_name", "round_number"])
+    previous = ordered.groupby("actor_name", sort=False)[["action_primary", "round_number"]].shift(1)
+    consecutive = (ordered["round_number"] - previous["round_number"]) == 1
+    steps = ordered.loc[consecutive, dims].assign(
+        action_from=previous.loc[consecutive, "action_primary"].values,
+        action_to=ordered.loc[consecutive, "action_primary"].values,
+    )
+    transitions = (
+        steps.groupby(dims + ["action_from", "action_to"], dropna=False)
+        .size().rename("count").reset_index()
+    )
+
+    judged = decisions[decisions["judge_verdict"].notna()]
+    verdicts = (
+        judged.groupby(dims + ["judge_verdict"], dropna=False)
+        .size().rename("count").reset_index()
+    )
+
+    council = (
+        decisions.assign(participations=(decisions["council_participation"] == "participar").astype(int))
+        .groupby(dims, dropna=False)
+        .agg(decisions=("action_primary", "size"), participations=("participations", "sum"))
+        .reset_index()
+    )
+
+    levels = decisions[decisions["escalation_level"].notna()]
+    escalation = (
+        levels.groupby(["scenario_id", "scenario_type", "round_number"], dropna=False)["escalation_level"]
+        .first().astype(float).reset_index()
+    )
+
+    # Resumo da execução (uma linha por réplica)
+    def first(column):
+        values = df[column].dropna()
+        return values.iloc[0] if not values.empty else np.nan
+
+    rounds_played = first("rounds_played")
+    if pd.isna(rounds_played):
+        rounds_played = decisions["round_number"].max()
+    total_rounds = first("total_rounds")
+    run = {
+        "scenario_id": first("scenario_id"),
+        "scenario_type": first("scenario_type"),
+        "n_actors": df["actor_name"].nunique(),
+        "rounds_played": rounds_played,
+        "total_rounds": rounds_played if pd.isna(total_rounds) else total_rounds,
+        "stop_reason": first("stop_reason") if pd.notna(first("stop_reason")) else "max_rounds",
+        "final_escalation_level": first("final_escalation_level"),
+        "military_share": decisions["action_primary"].isin(_MILITARY_ACTIONS).mean(),
+        "council_participation_rate": (decisions["council_participation"] == "participar").mean(),
+    }
+    for verdict in _VERDICTS:
+        run[f"verdict_share_{verdict}"] = (judged["judge_verdict"] == verdict).mean() if len(judged) else np.nan
+
+    return {
+        "actions": actions,
+        "transitions": transitions,
+        "verdicts": verdicts,
+        "council": council,
+        "escalation": escalation,
+        "run": pd.DataFrame([run]),
+    }
+
+
+class ResultsAnalytics:
+    """
+    Motor de análise offline sobre os CSVs produzidos por `run_full_simulation`.
+
+    Cada arquivo de resultados é tratado como uma réplica e reduzido, uma única vez,
+    a tabelas de contagem aditivas (parciais). Os parciais ficam em cache em memória
+    e em disco, indexados pelo caminho, tamanho e data de modificação do arquivo,
+    de modo que `refresh()` só lê os CSVs novos ou alterados e soma os novos parciais
+    aos agregados já existentes.
+    """
+    def __init__(
+        self,
+        results_dir: str = "outputs",
+        pattern: str = "**/resultados_*.csv",
+        cache_dir: Optional[str] = None,
+        verdict_column: str = "judge_verdict",
+    ):
+        """
+        Inicializa o motor de análise. Nenhum arquivo é lido até a primeira consulta.
+
+        Args:
+            results_dir (str): Pasta onde estão os CSVs de resultados.
+            pattern (str): Padrão glob (relativo a `results_dir`) dos arquivos de resultados.
+            cache_dir (str | None): Pasta do cache em disco dos parciais. Por omissão,
+                `<results_dir>/.analytics_cache`. Use uma string vazia para desativar.
+            verdict_column (str): Coluna de vereditos a analisar, ex.: `judge_verdict__<hash>`
+                para os vereditos produzidos por `rejudge.py`.
+        """
+        self.results_dir = results_dir
+        self.pattern = pattern
+        self.cache_dir = os.path.join(results_dir, ".analytics_cache") if cache_dir is None else cache_dir
+        self.verdict_column = verdict_column
+
+        self._signatures: Dict[str, Tuple[int, int]] = {}
+        self._partials: Dict[str, Dict[str, pd.DataFrame]] = {}
+        self._totals: Optional[Dict[str, pd.DataFrame]] = None
+        self._loaded = False
+
+    # ------------------------------------------------------------------
+    # Carregamento incremental
+    # ------------------------------------------------------------------
+    def refresh(self) -> Dict[str, list]:
+        """
+        Procura arquivos de resultados novos, alterados ou removidos e atualiza os agregados.
+
+        Arquivos novos são somados aos agregados existentes; só uma alteração ou remoção
+        obriga a reconstruir os totais (a partir dos parciais, sem reler os CSVs).
+
+        Returns:
+            dict: Listas de caminhos 'added', 'changed' e 'removed'.
+        """
+        paths = sorted(glob.glob(os.path.join(self.results_dir, self.pattern), recursive=True))
+        current = {}
+        for path in paths:
+            stat = os.stat(path)
+            current[path] = (stat.st_mtime_ns, stat.st_size)
+
+        added = [p for p in current if p not in self._signatures]
+        changed = [p for p in current if p in self._signatures and self._signatures[p] != current[p]]
+        removed = [p for p in self._signatures if p not in current]
+
+        for path in removed:
+            self._signatures.pop(path)
+            self._partials.pop(path)
+        for path in added + changed:
+            self._partials[path] = self._load_partials(path, current[path])
+            self._signatures[path] = current[path]
+
+        if changed or removed or self._totals is None:
+            self._totals = self._merge(self._partials.values())
+        elif added:
+            self._totals = self._merge([self._totals] + [self._partials[p] for p in added])
+
+        self._loaded = True
+        if added or changed or removed:
+            print(f"📊 Análise: {len(added)} novos, {len(changed)} alterados, {len(removed)} removidos "
+                  f"({len(self._partials)} réplicas no total).")
+        return {"added": added, "changed": changed, "removed": removed}
+
+    def _cache_path(self, path: str) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        digest = hashlib.sha1(f"{os.path.abspath(path)}|{self.verdict_column}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.pkl")
+
+    def _load_partials(self, path: str, signature: Tuple[int, int]) -> Dict[str, pd.DataFrame]:
+        """Lê os parciais do cache em disco ou, se estiverem desatualizados, do próprio CSV."""
+        cache_path = self._cache_path(path)
+        if cache_path and os.path.exists(cache_path):
+            try:
+                with open(cache_path, "rb") as f:
+                    cached = pickle.load(f)
+                if cached.get("version") == _CACHE_VERSION and cached.get("signature") == signature:
+                    return cached["partials"]
+            except Exception as e:
+                print(f"   ⚠️ Cache de análise ilegível para '{path}': {e}. A recalcular.")
+
+        used_columns = (_USED_COLUMNS - {"judge_verdict"}) | {self.verdict_column}
+        df = pd.read_csv(path, usecols=lambda c: c in used_columns, encoding="utf-8-sig")
+        df = df.rename(columns={self.verdict_column: "judge_verdict"})
+        partials = _compute_partials(df)
+
+        if cache_path:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(cache_path, "wb") as f:
+                pickle.dump({"version": _CACHE_VERSION, "signature": signature, "partials": partials}, f)
+        return partials
+
+    @staticmethod
+    def _merge(partials_list: Iterable[Dict[str, pd.DataFrame]]) -> Dict[str, pd.DataFrame]:
+        partials_list = list(partials_list)
+        dims = list(DIMENSIONS)
+        return {
+            "actions": _sum_counts([p["actions"] for p in partials_list], dims + ["action_primary"]),
+            "transitions": _sum_counts([p["transitions"] for p in partials_list], dims + ["action_from", "action_to"]),
+            "verdicts": _sum_counts([p["verdicts"] for p in partials_list], dims + ["judge_verdict"]),
+            "council": _sum_counts([p["council"] for p in partials_list], dims),
+        }
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.refresh()
+
+    @staticmethod
+    def _check_by(by: Sequence[str]) -> list:
+        by = [by] if isinstance(by, str) else list(by)
+        unknown = [b for b in by if b not in DIMENSIONS]
+        if unknown:
+            raise ValueError(f"Dimensões desconhecidas: {unknown}. Use um subconjunto de {DIMENSIONS}.")
+        return by
+
+    @property
+    def replicates(self) -> list:
+        """Caminhos dos arquivos de resultados atualmente agregados."""
+        self._ensure_loaded()
+        return list(self._partials)
+
+    # ------------------------------------------------------------------
+    # Estatísticas
+    # ------------------------------------------------------------------
+    def action_distribution(self, by: Sequence[str] = ("llm_model",)) -> pd.DataFrame:
+        """Frequência relativa de cada `action_primary` por grupo (linhas: grupos; colunas: ações)."""
+        self._ensure_loaded()
+        by = self._check_by(by)
+        counts = self._totals["actions"].groupby(by + ["action_primary"], dropna=False)["count"].sum()
+        table = counts.unstack("action_primary", fill_value=0)
+        return table.div(table.sum(axis=1), axis=0)
+
+    def transition_matrix(self, normalize: bool = True, **filters) -> pd.DataFrame:
+        """
+        Matriz de transição entre a ação de uma rodada e a ação da rodada seguinte do mesmo ator.
+
+        Args:
+            normalize (bool): Se True, cada linha é normalizada para somar 1 (probabilidades);
+                caso contrário, devolve as contagens.
+            **filters: Filtros de igualdade sobre as dimensões, ex.: `llm_model="sabia-3.1"`.
+        """
+        self._ensure_loaded()
+        self._check_by(list(filters))
+        transitions = self._totals["transitions"]
+        for column, value in filters.items():
+            transitions = transitions[transitions[column] == value]
+
+        matrix = transitions.pivot_table(
+            index="action_from", columns="action_to", values="count", aggfunc="sum", fill_value=0
+        )
+        states = matrix.index.union(matrix.columns)
+        matrix = matrix.reindex(index=states, columns=states, fill_value=0)
+        if normalize:
+            totals = matrix.sum(axis=1).replace(0, np.nan)
+            matrix = matrix.div(totals, axis=0).fillna(0.0)
+        return matrix
+
+    def verdict_distribution(self, by: Sequence[str] = ("llm_model",)) -> pd.DataFrame:
+        """Proporção de cada veredito do Juiz por grupo (linhas: grupos; colunas: vereditos)."""
+        self._ensure_loaded()
+        by = self._check_by(by)
+        counts = self._totals["verdicts"].groupby(by + ["judge_verdict"], dropna=False)["count"].sum()
+        table = counts.unstack("judge_verdict", fill_value=0)
+        return table.div(table.sum(axis=1), axis=0)
+
+    def council_participation(self, by: Sequence[str] = ("llm_model",)) -> pd.DataFrame:
+        """Taxa de participação no Conselho Global por grupo."""
+        self._ensure_loaded()
+        by = self._check_by(by)
+        table = self._totals["council"].groupby(by, dropna=False)[["decisions", "participations"]].sum()
+        table["participation_rate"] = table["participations"] / table["decisions"].replace(0, np.nan)
+        return table
+
+    def escalation_trajectories(self) -> pd.DataFrame:
+        """
+        Nível de escalada em vigor em cada rodada, por réplica.
+
+        Returns:
+            pd.DataFrame: Índice (réplica, scenario_id, scenario_type); uma coluna por rodada.
+            Arquivos gerados antes da coluna `escalation_level` existir são ignorados.
+        """
+        self._ensure_loaded()
+        frames = [
+            p["escalation"].assign(replicate=path)
+            for path, p in self._partials.items() if not p["escalation"].empty
+        ]
+        if not frames:
+            return pd.DataFrame()
+        levels = pd.concat(frames, ignore_index=True)
+        return levels.pivot_table(
+            index=["replicate", "scenario_id", "scenario_type"], columns="round_number",
+            values="escalation_level", aggfunc="first", dropna=False,
+        )
+
+    def escalation_summary(self, by: str = "scenario_type") -> pd.DataFrame:
+        """Média do nível de escalada por rodada, agregada sobre as réplicas de cada grupo."""
+        trajectories = self.escalation_trajectories()
+        if trajectories.empty:
+            return trajectories
+        return trajectories.groupby(level=by, dropna=False).mean()
+
+    def run_summary(self) -> pd.DataFrame:
+        """
+        Uma linha por réplica com o motivo de paragem, as rodadas jogadas e as estatísticas
+        de desfecho (escalada final, proporção de ações militares, participação no Conselho
+        e proporção de cada veredito).
+        """
+        self._ensure_loaded()
+        if not self._partials:
+            return pd.DataFrame()
+        runs = pd.concat([p["run"].assign(replicate=path) for path, p in self._partials.items()], ignore_index=True)
+        return runs.set_index("replicate")
+
+    def bootstrap_ci(
+        self,
+        metric: str = "council_participation",
+        by: Sequence[str] = ("llm_model",),
+        verdict: Optional[str] = None,
+        n_boot: int = 2000,
+        confidence: float = 0.95,
+        seed: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Intervalos de confiança bootstrap para uma taxa, reamostrando réplicas inteiras.
+
+        As decisões de uma mesma réplica não são independentes entre si, por isso a
+        reamostragem é feita ao nível dos arquivos de resultados (bootstrap por cluster).
+        Todas as reamostragens são calculadas de uma vez com produtos matriciais.
+
+        Args:
+            metric (str): "council_participation" ou "verdict_share".
+            by (Sequence[str]): Dimensões de agrupamento.
+            verdict (str | None): Veredito cuja proporção é estimada (obrigatório para "verdict_share").
+            n_boot (int): Número de reamostragens.
+            confidence (float): Nível de confiança do intervalo.
+            seed (int | None): Semente do gerador aleatório.
+
+        Returns:
+            pd.DataFrame: Colunas `estimate`, `ci_low`, `ci_high` e `n_replicates` por grupo.
+        """
+        self._ensure_loaded()
+        by = self._check_by(by)
+
+        rows = []
+        for replicate, partials in self._partials.items():
+            if metric == "council_participation":
+                frame = partials["council"].rename(columns={"participations": "num", "decisions": "den"})
+            elif metric == "verdict_share":
+                if verdict is None:
+                    raise ValueError("O parâmetro 'verdict' é obrigatório para a métrica 'verdict_share'.")
+                frame = partials["verdicts"].assign(
+                    num=lambda d: d["count"].where(d["judge_verdict"] == verdict, 0), den=lambda d: d["count"]
+                )
+            else:
+                raise ValueError(f"Métrica '{metric}' não suportada.")
+            rows.append(frame.groupby(by, dropna=False)[["num", "den"]].sum().assign(replicate=replicate))
+
+        if not rows:
+            return pd.DataFrame(columns=["estimate", "ci_low", "ci_high", "n_replicates"])
+
+        per_replicate = pd.concat(rows).reset_index()
+        numerators = per_replicate.pivot_table(index="replicate", columns=by, values="num", aggfunc="sum", fill_value=0)
+        denominators = per_replicate.pivot_table(index="replicate", columns=by, values="den", aggfunc="sum", fill_value=0)
+        denominators = denominators.reindex(columns=numerators.columns, fill_value=0)
+
+        n_rep = len(numerators)
+        rng = np.random.default_rng(seed)
+        weights = rng.multinomial(n_rep, np.full(n_rep, 1.0 / n_rep), size=n_boot)
+        num_boot = weights @ numerators.to_numpy(dtype=float)
+        den_boot = weights @ denominators.to_numpy(dtype=float)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rates = np.where(den_boot > 0, num_boot / den_boot, np.nan)
+
+        alpha = (1.0 - confidence) / 2.0
+        num_total = numerators.to_numpy(dtype=float).sum(axis=0)
+        den_total = denominators.to_numpy(dtype=float).sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            estimate = np.where(den_total > 0, num_total / den_total, np.nan)
+
+        return pd.DataFrame(
+            {
+                "estimate": estimate,
+                "ci_low": np.nanquantile(rates, alpha, axis=0),
+                "ci_high": np.nanquantile(rates, 1.0 - alpha, axis=0),
+                "n_replicates": (denominators > 0).sum(axis=0).to_numpy(),
+            },
+            index=numerators.columns,
+        )
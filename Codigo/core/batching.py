@@ -0,0 +1,283 @@
+import json
+import os
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from langchain_core.exceptions import OutputParserException
+from langchain_core.output_parsers import JsonOutputParser
+
+from .agent import AGENT_PROMPT, StateAgent
+from .llm_builder import DEFAULT_TEMPERATURE, get_http_client
+from .models import Decision
+from config.simulation_config import BATCH_CONFIG
+
+# Provedores com uma Batch API compatível com a da OpenAI: (endereço base, variável da chave de API)
+BATCH_PROVIDERS = {
+    "openai": ("https://api.openai.com/v1", "OPENAI_API_KEY"),
+    "groq": ("https://api.groq.com/openai/v1", "GROQ_API_KEY"),
+}
+
+_MESSAGE_ROLES = {"system": "system", "human": "user", "ai": "assistant"}
+
+_FINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+class BatchRequestError(Exception):
+    """Exceção para quando um lote não é concluído ou um pedido individual do lote falha."""
+
+
+class OpenAIBatchClient:
+    """
+    Cliente mínimo da Batch API no formato da OpenAI (/files + /batches), usado também pela Groq.
+
+    Os pedidos são enviados como um arquivo JSONL; a espera pela conclusão fica a cargo de
+    quem submete, para que vários lotes possam ser acompanhados em simultâneo.
+    """
+    def __init__(self, provider: str, base_url: Optional[str] = None):
+        default_url, key_env = BATCH_PROVIDERS[provider]
+        api_key = os.getenv(key_env)
+        if not api_key: raise ValueError(f"Chave de API {key_env} não encontrada no arquivo .env")
+
+        self.base_url = (base_url or default_url).rstrip("/")
+        self.headers = {"Authorization": f"Bearer {api_key}"}
+        self.http = get_http_client(provider)
+        if self.http is None: raise ImportError("httpx não está instalado.")
+
+    def _request(self, method: str, path: str, **kwargs):
+        response = self.http.request(method, f"{self.base_url}{path}", headers=self.headers, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def _read_jsonl(self, file_id: Optional[str]) -> List[dict]:
+        if not file_id:
+            return []
+        content = self._request("GET", f"/files/{file_id}/content").text
+        return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+    def submit(self, requests: List[dict]) -> dict:
+        """
+        Envia o arquivo de pedidos e cria o lote, sem esperar pela conclusão.
+
+        Args:
+            requests (List[dict]): Linhas do lote (`custom_id`, `method`, `url`, `body`).
+
+        Returns:
+            dict: O objeto do lote devolvido pela API.
+        """
+        payload = "\n".join(json.dumps(r, ensure_ascii=False) for r in requests).encode("utf-8")
+        input_file = self._request(
+            "POST", "/files",
+            files={"file": ("batch.jsonl", payload, "application/jsonl")},
+            data={"purpose": "batch"},
+        ).json()
+        return self._request("POST", "/batches", json={
+            "input_file_id": input_file["id"],
+            "endpoint": "/v1/chat/completions",
+            "completion_window": "24h",
+        }).json()
+
+    def retrieve(self, batch_id: str) -> dict:
+        return self._request("GET", f"/batches/{batch_id}").json()
+
+    def cancel(self, batch_id: str) -> dict:
+        return self._request("POST", f"/batches/{batch_id}/cancel").json()
+
+    def results(self, batch: dict) -> Dict[str, Any]:
+        """
+        Lê os arquivos de saída e de erros de um lote, mesmo que este tenha sido cancelado ou expirado.
+
+        Returns:
+            Dict[str, Any]: Para cada `custom_id` já processado, o texto da resposta ou uma `BatchRequestError`.
+        """
+        results = {}
+        for line in self._read_jsonl(batch.get("output_file_id")) + self._read_jsonl(batch.get("error_file_id")):
+            response = line.get("response") or {}
+            if line.get("error") or response.get("status_code") != 200:
+                results[line["custom_id"]] = BatchRequestError(str(line.get("error") or response.get("body")))
+            else:
+                results[line["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+        return results
+
+
+class BatchDecisionRunner:
+    """
+    Decide uma rodada agrupando os agentes que usam o mesmo modelo num único lote por provedor.
+
+    Cada resposta do lote é validada pelo próprio agente (`StateAgent.complete_decision`),
+    com a mesma autocorreção das decisões individuais. Grupos de provedores sem Batch API,
+    grupos pequenos e lotes que falham são decididos individualmente com `StateAgent.decide`.
+    """
+    def __init__(self, agents: Dict[str, StateAgent], llm_assignment: Dict[str, dict], config: Optional[dict] = None):
+        """
+        Args:
+            agents (Dict[str, StateAgent]): Agentes do cenário, por nome do ator.
+            llm_assignment (Dict[str, dict]): Entrada do LLM_CONFIG (`provider`, `model`, `temperature`) de cada ator.
+            config (dict | None): Valores que substituem os de `BATCH_CONFIG`.
+        """
+        self.agents = agents
+        self.llm_assignment = llm_assignment
+        self.config = {**BATCH_CONFIG, **(config or {})}
+        self._parser = JsonOutputParser()
+
+    def _request_body(self, config_llm: dict, prompt_variables: dict) -> dict:
+        messages = [
+            {"role": _MESSAGE_ROLES.get(m.type, "user"), "content": m.content}
+            for m in AGENT_PROMPT.format_messages(**prompt_variables)
+        ]
+        if self.config["response_format"] == "json_schema":
+            response_format = {
+                "type": "json_schema",
+                "json_schema": {"name": "Decision", "schema": Decision.model_json_schema()},
+            }
+        else:
+            response_format = {"type": "json_object"}
+
+        # Mesma temperatura com que o agente foi construído por `get_llm` (ver main.py)
+        return {
+            "model": config_llm["model"],
+            "messages": messages,
+            "response_format": response_format,
+            "temperature": config_llm.get("temperature", DEFAULT_TEMPERATURE),
+        }
+
+    def _parse(self, content: str) -> Any:
+        """Converte o texto da resposta em dicionário; se não for JSON, devolve o texto para autocorreção."""
+        try:
+            return self._parser.parse(content)
+        except OutputParserException:
+            return content
+
+    def _decide_individually(self, actor_name: str, decide_kwargs: dict) -> Any:
+        try:
+            return self.agents[actor_name].decide(**decide_kwargs)
+        except Exception as e:
+            return e
+
+    def _submit_batch(self, provider: str, model: str, actor_names: List[str], decide_kwargs: Dict[str, dict]) -> dict:
+        """Prepara os prompts de um grupo e submete o lote, devolvendo o estado necessário para o concluir."""
+        print(f"\n📦 Lote de {len(actor_names)} agentes para '{model}' ({provider}): {', '.join(actor_names)}")
+        client = OpenAIBatchClient(provider, base_url=self.config["base_urls"].get(provider))
+
+        prepared, requests = {}, []
+        for index, actor_name in enumerate(actor_names):
+            prompt_variables, context = self.agents[actor_name].prepare_decision(**decide_kwargs[actor_name])
+            custom_id = f"agent-{index}"
+            prepared[actor_name] = (custom_id, context)
+            requests.append({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._request_body(self.llm_assignment[actor_name], prompt_variables),
+            })
+
+        return {"client": client, "model": model, "prepared": prepared, "batch": client.submit(requests), "outputs": {}}
+
+    def _collect(self, job: dict) -> Dict[str, Any]:
+        """Lê as respostas disponíveis de um lote; em caso de erro, todos os pedidos caem no modo individual."""
+        try:
+            return job["client"].results(job["batch"])
+        except Exception as e:
+            print(f"   ⚠️ Não foi possível ler o resultado do lote para '{job['model']}': {e}")
+            return {}
+
+    def _cancel(self, job: dict) -> Dict[str, Any]:
+        """Guarda as respostas parciais de um lote atrasado e cancela-o."""
+        outputs = self._collect(job)
+        try:
+            job["batch"] = job["client"].cancel(job["batch"]["id"])
+            # Alguns provedores só publicam o arquivo parcial na resposta ao cancelamento
+            for custom_id, output in self._collect(job).items():
+                outputs.setdefault(custom_id, output)
+        except Exception as e:
+            print(f"   ⚠️ Não foi possível cancelar o lote {job['batch']['id']}: {e}")
+        return outputs
+
+    def _wait_for_batches(self, jobs: List[dict]):
+        """
+        Acompanha todos os lotes submetidos em simultâneo até terminarem ou até ao tempo máximo.
+
+        O intervalo entre consultas começa em `poll_interval` e é multiplicado por `poll_backoff`
+        a cada consulta, até `max_poll_interval`, para limitar o número de pedidos de estado.
+        """
+        deadline = time.monotonic() + self.config["timeout"]
+        interval = self.config["poll_interval"]
+        waiting = list(jobs)
+        while waiting:
+            for job in [j for j in waiting if j["batch"]["status"] in _FINAL_STATUSES]:
+                if job["batch"]["status"] != "completed":
+                    print(f"   ⚠️ O lote para '{job['model']}' terminou com o estado '{job['batch']['status']}'.")
+                job["outputs"] = self._collect(job)
+                waiting.remove(job)
+            if not waiting:
+                break
+
+            if time.monotonic() > deadline:
+                for job in waiting:
+                    job["outputs"] = self._cancel(job)
+                    print(f"   ⏱️ O lote para '{job['model']}' não terminou em {self.config['timeout']:.0f}s e foi cancelado "
+                          f"({len(job['outputs'])}/{len(job['prepared'])} respostas aproveitadas).")
+                break
+
+            time.sleep(max(0.0, min(interval, deadline - time.monotonic())))
+            interval = min(interval * self.config["poll_backoff"], self.config["max_poll_interval"])
+            for job in waiting:
+                try:
+                    job["batch"] = job["client"].retrieve(job["batch"]["id"])
+                except Exception as e:
+                    print(f"   ⚠️ Falha ao consultar o lote {job['batch']['id']}: {e}")
+
+    def _complete_batch(self, job: dict, decide_kwargs: Dict[str, dict]) -> Dict[str, Any]:
+        """Valida as respostas de um lote; só os pedidos sem resposta válida são refeitos individualmente."""
+        decisions = {}
+        for actor_name, (custom_id, context) in job["prepared"].items():
+            output = job["outputs"].get(custom_id, BatchRequestError("Resposta ausente no resultado do lote."))
+            if isinstance(output, Exception):
+                print(f"   ⚠️ Pedido de '{actor_name}' falhou no lote ({output}). A decidir individualmente.")
+                decisions[actor_name] = self._decide_individually(actor_name, decide_kwargs[actor_name])
+                continue
+            try:
+                decisions[actor_name] = self.agents[actor_name].complete_decision(self._parse(output), context)
+            except Exception as e:
+                decisions[actor_name] = e
+        return decisions
+
+    def decide_round(self, decide_kwargs: Dict[str, dict]) -> Dict[str, Any]:
+        """
+        Obtém as decisões de todos os agentes para uma rodada.
+
+        Todos os lotes são submetidos antes de qualquer espera; os agentes fora de um lote
+        decidem individualmente enquanto os lotes são processados pelos provedores.
+
+        Args:
+            decide_kwargs (Dict[str, dict]): Argumentos de `StateAgent.decide` para cada ator.
+
+        Returns:
+            Dict[str, Any]: A `Decision` de cada ator ou a exceção que impediu a decisão.
+        """
+        groups = defaultdict(list)
+        for actor_name in decide_kwargs:
+            config_llm = self.llm_assignment[actor_name]
+            temperature = config_llm.get("temperature", DEFAULT_TEMPERATURE)
+            groups[(config_llm["provider"].lower(), config_llm["model"], temperature)].append(actor_name)
+
+        jobs, individual = [], []
+        for (provider, model, _), actor_names in groups.items():
+            if provider in BATCH_PROVIDERS and len(actor_names) >= self.config["min_group_size"]:
+                try:
+                    jobs.append(self._submit_batch(provider, model, actor_names, decide_kwargs))
+                    continue
+                except Exception as e:
+                    print(f"   ⚠️ Lote para '{model}' falhou: {e}. A decidir individualmente.")
+            individual.extend(actor_names)
+
+        decisions = {}
+        for actor_name in individual:
+            decisions[actor_name] = self._decide_individually(actor_name, decide_kwargs[actor_name])
+
+        self._wait_for_batches(jobs)
+        for job in jobs:
+            decisions.update(self._complete_batch(job, decide_kwargs))
+
+        # Mantém a ordem original dos atores
+        return {actor_name: decisions[actor_name] for actor_name in decide_kwargs}
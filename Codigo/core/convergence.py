@@ -0,0 +1,93 @@
+from collections import Counter
+from typing import Optional
+
+from config.simulation_config import CONVERGENCE_CONFIG
+
+# Motivos de paragem registados nos resultados
+STOP_MAX_ROUNDS = "max_rounds"
+STOP_REPEATED_PROFILE = "repeated_profile"
+STOP_ABSORBING_ESCALATION = "absorbing_escalation"
+STOP_STABLE_DISTRIBUTION = "stable_distribution"
+
+
+def total_variation_distance(p: Counter, q: Counter) -> float:
+    """Distância de variação total entre duas distribuições de ações dadas por contagens."""
+    total_p, total_q = sum(p.values()), sum(q.values())
+    if not total_p or not total_q:
+        return 1.0
+    return 0.5 * sum(abs(p[a] / total_p - q[a] / total_q) for a in set(p) | set(q))
+
+
+class ConvergenceDetector:
+    """
+    Deteta quando um cenário atingiu um estado estacionário, para terminar a simulação mais cedo.
+
+    É atualizado após a análise de cada rodada e devolve o motivo de paragem assim que um
+    dos critérios ativos é satisfeito. Rodadas sem decisões ou cuja análise falhou ficam
+    registadas como lacunas e interrompem as sequências de todos os critérios:
+      - "repeated_profile": as mesmas ações por ator em `repeat_rounds` rodadas seguidas
+        (e, opcionalmente, o mesmo nível de escalada);
+      - "absorbing_escalation": o nível de escalada permanece num nível absorvente
+        (ex.: 0 ou 5) durante `absorbing_rounds` rodadas;
+      - "stable_distribution": a distância de variação total entre a distribuição de ações
+        das últimas `distribution_window` rodadas e a da janela anterior é inferior a
+        `distribution_threshold`.
+    """
+    def __init__(self, config: Optional[dict] = None):
+        """
+        Args:
+            config (dict | None): Valores que substituem os de `CONVERGENCE_CONFIG`.
+        """
+        self.config = {**CONVERGENCE_CONFIG, **(config or {})}
+        self.profiles = []
+        self.levels = []
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.config["enabled"])
+
+    def _observed(self, start: int) -> bool:
+        """Indica se todas as rodadas a partir de `start` têm decisões e um nível de escalada."""
+        return all(self.profiles[start:]) and None not in self.levels[start:]
+
+    def update(self, round_decisions: dict, escalation_level: Optional[int]) -> Optional[str]:
+        """
+        Regista o resultado de uma rodada e verifica os critérios de convergência.
+
+        Args:
+            round_decisions (dict): {nome_do_ator: ação_tomada} da rodada.
+            escalation_level (int | None): Nível de escalada após a análise da rodada
+                (None se a análise falhou).
+
+        Returns:
+            str | None: O motivo de paragem, ou None se a simulação deve continuar.
+        """
+        cfg = self.config
+        self.profiles.append(dict(round_decisions))
+        self.levels.append(escalation_level)
+
+        if not self.enabled or len(self.profiles) < cfg["min_rounds"]:
+            return None
+
+        k = cfg["repeat_rounds"]
+        if k and len(self.profiles) >= k:
+            recent = self.profiles[-k:]
+            same_profile = self._observed(-k) and all(p == recent[0] for p in recent)
+            same_level = len(set(self.levels[-k:])) == 1 or not cfg["require_stable_escalation"]
+            if same_profile and same_level:
+                return STOP_REPEATED_PROFILE
+
+        k = cfg["absorbing_rounds"]
+        if k and len(self.levels) >= k and self._observed(-k):
+            recent_levels = set(self.levels[-k:])
+            if len(recent_levels) == 1 and recent_levels.pop() in cfg["absorbing_levels"]:
+                return STOP_ABSORBING_ESCALATION
+
+        window, threshold = cfg["distribution_window"], cfg["distribution_threshold"]
+        if threshold is not None and window and len(self.profiles) >= 2 * window and self._observed(-2 * window):
+            current = Counter(a for p in self.profiles[-window:] for a in p.values())
+            previous = Counter(a for p in self.profiles[-2 * window:-window] for a in p.values())
+            if total_variation_distance(current, previous) <= threshold:
+                return STOP_STABLE_DISTRIBUTION
+
+        return None
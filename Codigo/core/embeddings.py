@@ -0,0 +1,168 @@
+import hashlib
+import os
+import re
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from config.rag_config import EMBEDDING_CONFIG
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+try:
+    from tokenizers import Tokenizer
+except ImportError:
+    Tokenizer = None
+
+try:
+    from huggingface_hub import hf_hub_download
+except ImportError:
+    hf_hub_download = None
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    Embeddings de um modelo sentence-transformers executado com ONNX Runtime, sem PyTorch.
+
+    Reproduz o pipeline do `all-MiniLM-L6-v2` (mean pooling seguido de normalização L2),
+    de modo que os vetores são intercambiáveis com os do `HuggingFaceEmbeddings`.
+    Com `quantized=True`, os pesos são quantizados dinamicamente para int8 na primeira
+    execução e o modelo resultante fica guardado em `cache_dir`.
+    """
+    def __init__(
+        self,
+        model_name: str,
+        quantized: bool = False,
+        onnx_file: str = "onnx/model.onnx",
+        cache_dir: Optional[str] = None,
+        batch_size: int = 32,
+        max_length: int = 256,
+        num_threads: Optional[int] = None,
+    ):
+        """
+        Inicializa a sessão ONNX Runtime e o tokenizador.
+
+        Args:
+            model_name (str): Repositório do modelo no Hugging Face Hub ou pasta local com
+                `tokenizer.json` e o arquivo ONNX.
+            quantized (bool): Se True, usa a versão int8 (quantização dinâmica) do modelo.
+            onnx_file (str): Caminho do modelo ONNX dentro do repositório/pasta.
+            cache_dir (str | None): Pasta onde o modelo quantizado é guardado.
+            batch_size (int): Número de textos por execução do modelo.
+            max_length (int): Comprimento máximo, em tokens, de cada texto.
+            num_threads (int | None): Threads intra-operação do ONNX Runtime (None = automático).
+        """
+        if not ort: raise ImportError("onnxruntime não está instalado.")
+        if not Tokenizer: raise ImportError("tokenizers não está instalado.")
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+
+        model_path = self._resolve_file(onnx_file)
+        if quantized:
+            model_path = self._quantize(model_path, cache_dir or os.path.dirname(model_path), model_name)
+
+        self.tokenizer = Tokenizer.from_file(self._resolve_file("tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        output_names = [o.name for o in self.session.get_outputs()]
+        self._output_name = "last_hidden_state" if "last_hidden_state" in output_names else output_names[0]
+
+    def _resolve_file(self, filename: str) -> str:
+        """Devolve o caminho local de um arquivo do modelo, descarregando-o do Hub se necessário."""
+        if os.path.isdir(self.model_name):
+            return os.path.join(self.model_name, filename)
+        if not hf_hub_download: raise ImportError("huggingface_hub não está instalado.")
+        return hf_hub_download(repo_id=self.model_name, filename=filename)
+
+    @staticmethod
+    def _quantize(model_path: str, cache_dir: str, model_name: str) -> str:
+        """
+        Quantiza os pesos do modelo para int8 (uma única vez) e devolve o caminho do modelo quantizado.
+
+        O nome do arquivo em cache inclui o nome do modelo e um hash do .onnx de origem, para que
+        modelos diferentes (ou versões diferentes do mesmo modelo) não partilhem o mesmo arquivo.
+        """
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        digest = hashlib.sha256()
+        with open(model_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        safe_name = re.sub(r"[^\w.-]+", "_", model_name).strip("_.")
+        stem = os.path.splitext(os.path.basename(model_path))[0]
+
+        os.makedirs(cache_dir, exist_ok=True)
+        quantized_path = os.path.join(cache_dir, f"{safe_name}__{stem}_{digest.hexdigest()[:12]}_int8.onnx")
+        if not os.path.exists(quantized_path):
+            print("   - Quantizando o modelo de embedding para int8 (apenas na primeira execução)...")
+            quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+        return quantized_path
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            encodings = self.tokenizer.encode_batch(texts[start:start + self.batch_size])
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            feeds = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": attention_mask,
+            }
+            if "token_type_ids" in self._input_names:
+                feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+            hidden = self.session.run([self._output_name], feeds)[0]
+
+            # Mean pooling sobre os tokens reais, seguido de normalização L2
+            mask = attention_mask[:, :, None].astype(hidden.dtype)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            vectors.extend(pooled.tolist())
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(list(texts))
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text])[0]
+
+
+def build_embeddings(config: Optional[dict] = None) -> Embeddings:
+    """
+    Constrói o modelo de embedding configurado em `EMBEDDING_CONFIG`.
+
+    Args:
+        config (dict | None): Valores que substituem os de `EMBEDDING_CONFIG`.
+
+    Returns:
+        Embeddings: Objeto com a interface `embed_documents`/`embed_query` da LangChain,
+        aceite pelo FAISS e pela memória dos agentes.
+    """
+    config = {**EMBEDDING_CONFIG, **(config or {})}
+    backend = config["backend"].lower()
+
+    if backend == "huggingface":
+        # Importado aqui para que os backends ONNX não carreguem o PyTorch
+        from langchain_huggingface import HuggingFaceEmbeddings
+        return HuggingFaceEmbeddings(model_name=config["model_name"])
+    if backend in ("onnx", "onnx-int8"):
+        return OnnxEmbeddings(
+            model_name=config["model_name"],
+            quantized=backend == "onnx-int8",
+            onnx_file=config["onnx_file"],
+            cache_dir=config["onnx_cache_dir"],
+            batch_size=config["batch_size"],
+            max_length=config["max_length"],
+            num_threads=config["num_threads"],
+        )
+    raise ValueError(f"Backend de embedding '{backend}' não é suportado. Use 'huggingface', 'onnx' ou 'onnx-int8'.")
@@ -1,21 +1,28 @@
 import os
 import json
+import hashlib
+from itertools import zip_longest
 from operator import itemgetter
+from typing import List, get_args
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import Runnable, RunnablePassthrough
+from langchain_core.runnables import Runnable, RunnableLambda
 from langchain_core.output_parsers import StrOutputParser
 
 # Ferramentas específicas para o RAG
 from langchain_community.document_loaders import PyPDFLoader
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
 # Ferramentas do nosso projeto
-from .models import Decision, Verdict
-from .llm_builder import build_llm
+from .models import Decision, Verdict, MILITARY_ACTIONS, DIPLOMATIC_ACTIONS
+from .llm_builder import get_llm
+from .embeddings import build_embeddings
+from .tokens import count_tokens, truncate_to_tokens
 from config.llm_config import LLM_CONFIG
-from .agent import AGENT_PROMPT
+from config.rag_config import JUDGE_RETRIEVAL_CONFIG, EMBEDDING_CONFIG
 
 JUDGE_PROMPT = ChatPromptTemplate.from_template(
     """Você é um Juiz académico, especialista em Teorias das Relações Internacionais. Sua tarefa é analisar a decisão de um ator e classificá-la de acordo com as teorias clássicas, usando os trechos do manual académico fornecido como sua principal referência.
@@ -41,68 +48,97 @@ Com base EXCLUSIVAMENTE nos trechos do manual e na decisão do ator, forneça um
 """
 )
 
+def _overlaps(a: Document, b: Document) -> bool:
+    """Indica se dois fragmentos do manual partilham texto (mesma página e intervalos sobrepostos)."""
+    if a.page_content == b.page_content:
+        return True
+    if a.metadata.get("source") != b.metadata.get("source") or a.metadata.get("page") != b.metadata.get("page"):
+        return False
+    start_a, start_b = a.metadata.get("start_index"), b.metadata.get("start_index")
+    if start_a is None or start_b is None:
+        return a.page_content in b.page_content or b.page_content in a.page_content
+    return start_a < start_b + len(b.page_content) and start_b < start_a + len(a.page_content)
+
+def format_docs(docs: List[Document]) -> str:
+    """Função auxiliar para juntar o conteúdo dos documentos recuperados em um único texto."""
+    return "\n\n---\n\n".join(doc.page_content for doc in docs)
+
 class Judge:
     """
     O Juiz da simulação. Carrega um manual de RI, cria uma base de conhecimento (RAG)
     e avalia as decisões dos agentes.
     """
-    def __init__(self, pdf_path: str):
+    def __init__(self, pdf_path: str, retrieval_config: dict | None = None, embedding_model: Embeddings | None = None):
         print("\n⚖️  Inicializando o Juiz...")
         if not os.path.exists(pdf_path):
             raise FileNotFoundError(f"Arquivo do manual não encontrado em: {pdf_path}")
 
+        self.retrieval_config = {**JUDGE_RETRIEVAL_CONFIG, **(retrieval_config or {})}
+
         # Configura o LLM do Juiz
         judge_config = LLM_CONFIG["juiz"]
-        self.llm = build_llm(
+        self.model_name = judge_config["model"]
+        self.config_hash = self._compute_config_hash(pdf_path, judge_config)
+        self.llm = get_llm(
             provider=judge_config["provider"],
             model=judge_config["model"],
             structured_output_model=Verdict
         )
 
         # Configura e constrói o pipeline RAG
-        self._setup_rag_pipeline(pdf_path)
+        self._setup_rag_pipeline(pdf_path, embedding_model)
         print("✅ Juiz pronto e base de conhecimento carregada.")
 
-    def _setup_rag_pipeline(self, pdf_path: str):
-        """Carrega o PDF, divide em pedaços, cria embeddings e armazena em um vector store."""
+    def _compute_config_hash(self, pdf_path: str, judge_config: dict) -> str:
+        """
+        Identificador curto da configuração do Juiz: manual, prompt, modelo, recuperação e embeddings.
+        Vereditos com o mesmo hash foram produzidos nas mesmas condições.
+        """
+        digest = hashlib.sha256()
+        with open(pdf_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        settings = {
+            "prompt": JUDGE_PROMPT.messages[0].prompt.template,
+            "llm": judge_config,
+            "retrieval": self.retrieval_config,
+            "embeddings": EMBEDDING_CONFIG,
+            "schema": Verdict.model_json_schema(),
+        }
+        digest.update(json.dumps(settings, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        return digest.hexdigest()[:12]
+
+    def _setup_rag_pipeline(self, pdf_path: str, embeddings: Embeddings | None = None):
+        """Carrega o PDF, divide em pedaços, cria embeddings, armazena em um vector store e pré-calcula os trechos por ação."""
+        cfg = self.retrieval_config
+
         print("   - Carregando o manual de RI...")
         loader = PyPDFLoader(pdf_path)
         docs = loader.load()
 
         print(f"   - Dividindo o manual em {len(docs)} páginas/pedaços...")
-        text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=cfg["chunk_size"], chunk_overlap=cfg["chunk_overlap"], add_start_index=True
+        )
         splits = text_splitter.split_documents(docs)
 
         print("   - Criando embeddings (isso pode levar um momento)...")
         # Usando um modelo de embedding local e gratuito para evitar custos de API
-        embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+        if embeddings is None:
+            embeddings = build_embeddings()
 
         print("   - Criando o banco de dados vetorial (FAISS)...")
-        vectorstore = FAISS.from_documents(documents=splits, embedding=embeddings)
-        self.retriever = vectorstore.as_retriever()
-
-        # Define a cadeia RAG final
-        self.rag_chain = (
-            {
-                "retrieved_context": self.retriever,
-                "action": RunnablePassthrough(),
-                "justification": RunnablePassthrough(),
-                "council_action": RunnablePassthrough(),
-                "schema": RunnablePassthrough()
-             }
-            | AGENT_PROMPT
-            | self.llm
-        )
+        self.vectorstore = self._build_vectorstore(splits, embeddings)
+        self.retriever = self.vectorstore.as_retriever(search_kwargs=dict(k=cfg["justification_k"]))
 
-        def format_docs(docs):
-            """Função auxiliar para juntar o conteúdo dos documentos recuperados em um único texto."""
-            return "\n\n---\n\n".join(doc.page_content for doc in docs)
+        print("   - Pré-calculando os trechos do manual para cada ação possível...")
+        self.action_passages = self._precompute_action_passages(embeddings)
 
         self.rag_chain = (
             {
-                # O 'retriever' agora é alimentado especificamente pela 'justification'.
-                # A sua saída (lista de documentos) é então formatada para texto pela 'format_docs'.
-                "retrieved_context": itemgetter("justification") | self.retriever | format_docs,
+                # O contexto combina os trechos pré-calculados da ação com os trechos da justificativa,
+                # sem sobreposições e dentro do orçamento de tokens.
+                "retrieved_context": RunnableLambda(self._retrieve_context),
                 # Usamos 'itemgetter' para passar os outros valores diretamente.
                 "action": itemgetter("action"),
                 "justification": itemgetter("justification"),
@@ -113,17 +149,121 @@ class Judge:
             | self.llm
         )
 
-    def evaluate(self, decision: Decision) -> Verdict:
-        print(f"⚖️  Juiz avaliando a decisão...")
+    def _build_vectorstore(self, splits: List[Document], embeddings: Embeddings) -> FAISS:
+        """Cria o índice FAISS exato ou, para manuais grandes, um índice aproximado HNSW."""
+        cfg = self.retrieval_config
+        index_type = cfg["index_type"]
+        if index_type == "auto":
+            index_type = "hnsw" if len(splits) >= cfg["approx_index_min_chunks"] else "flat"
+
+        if index_type == "flat":
+            return FAISS.from_documents(documents=splits, embedding=embeddings)
+
+        if index_type == "hnsw":
+            import faiss
 
-        # O dicionário de invocação permanece o mesmo
-        response = self.rag_chain.invoke({
+            print(f"   - Usando índice aproximado HNSW para {len(splits)} fragmentos.")
+            dimension = len(embeddings.embed_query("dimensão"))
+            index = faiss.IndexHNSWFlat(dimension, cfg["hnsw_m"])
+            index.hnsw.efSearch = cfg["hnsw_ef_search"]
+            vectorstore = FAISS(
+                embedding_function=embeddings,
+                index=index,
+                docstore=InMemoryDocstore(),
+                index_to_docstore_id={},
+            )
+            vectorstore.add_documents(splits)
+            return vectorstore
+
+        raise ValueError(f"Tipo de índice '{index_type}' não é suportado. Use 'flat', 'hnsw' ou 'auto'.")
+
+    @staticmethod
+    def _select(candidates: List[Document], selected: List[Document], k: int) -> List[Document]:
+        """Acrescenta até `k` candidatos que não se sobrepõem aos já selecionados."""
+        added = []
+        for doc in candidates:
+            if len(added) >= k:
+                break
+            if not any(_overlaps(doc, other) for other in selected + added):
+                added.append(doc)
+        return added
+
+    def _precompute_action_passages(self, embeddings: Embeddings) -> dict:
+        """Consulta o índice uma única vez para cada `action_primary` possível."""
+        cfg = self.retrieval_config
+        actions = list(get_args(MILITARY_ACTIONS)) + list(get_args(DIPLOMATIC_ACTIONS))
+        vectors = embeddings.embed_documents(actions)
+
+        passages = {}
+        for action, vector in zip(actions, vectors):
+            candidates = self.vectorstore.similarity_search_by_vector(vector, k=cfg["fetch_k"])
+            passages[action] = self._select(candidates, [], cfg["action_k"])
+        return passages
+
+    def _retrieve_context(self, inputs: dict) -> str:
+        """Monta o bloco de referência do manual para uma decisão, respeitando o orçamento de tokens."""
+        cfg = self.retrieval_config
+        action = inputs["action"]
+
+        if action not in self.action_passages:
+            candidates = self.vectorstore.similarity_search(action, k=cfg["fetch_k"])
+            self.action_passages[action] = self._select(candidates, [], cfg["action_k"])
+        action_docs = list(self.action_passages[action])
+
+        # Os trechos da justificativa que repetem os da ação são descartados, encurtando o contexto
+        candidates = self.vectorstore.similarity_search(inputs["justification"], k=cfg["justification_k"])
+        justification_docs = self._select(candidates, action_docs, cfg["justification_k"])
+
+        # Intercala os trechos da ação e da justificativa antes de aplicar o orçamento, para que
+        # um orçamento curto não seja consumido apenas pelos trechos pré-calculados da ação
+        selected = [
+            doc
+            for pair in zip_longest(action_docs, justification_docs)
+            for doc in pair if doc is not None
+        ]
+
+        budget = cfg["context_token_budget"]
+        context, used = [], 0
+        for doc in selected:
+            tokens = count_tokens(doc.page_content, self.model_name)
+            if used + tokens <= budget:
+                context.append(doc)
+                used += tokens
+            elif not context:
+                # Garante pelo menos um trecho, truncado ao orçamento
+                context.append(Document(page_content=truncate_to_tokens(doc.page_content, budget, self.model_name), metadata=doc.metadata))
+                break
+        return format_docs(context)
+
+    @staticmethod
+    def _chain_input(decision: Decision) -> dict:
+        return {
             "action": decision.action_primary,
             "justification": decision.justification_text,
             "council_action": decision.council_action or "Nenhuma",
             "schema": json.dumps(Verdict.model_json_schema(), ensure_ascii=False, indent=2)
-        })
+        }
+
+    def evaluate(self, decision: Decision) -> Verdict:
+        print(f"⚖️  Juiz avaliando a decisão...")
+
+        response = self.rag_chain.invoke(self._chain_input(decision))
         return response
 
+    def evaluate_many(self, decisions: List[Decision], max_concurrency: int = 8) -> List[Verdict | Exception]:
+        """
+        Avalia várias decisões em paralelo.
+
+        Args:
+            decisions (List[Decision]): Decisões a avaliar.
+            max_concurrency (int): Número máximo de avaliações simultâneas.
 
-   
\ No newline at end of file
+        Returns:
+            List[Verdict | Exception]: Um veredito por decisão, na mesma ordem; as avaliações
+            que falharem devolvem a exceção correspondente em vez de interromper o lote.
+        """
+        return self.rag_chain.batch(
+            [self._chain_input(d) for d in decisions],
+            config={"max_concurrency": max_concurrency},
+            return_exceptions=True,
+        )
\ No newline at end of file
@@ -1,11 +1,20 @@
 import os
 import json
+import atexit
+import threading
 from langchain_core.runnables import Runnable
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.exceptions import OutputParserException
 from pydantic import BaseModel
 from typing import Optional, Type, Any
 
+from config.llm_config import HTTP_POOL_CONFIG
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
 try:
     from langchain_openai import ChatOpenAI
 except ImportError:
@@ -36,6 +45,15 @@ try:
 except ImportError:
     ChatXAI = None
 
+# Provedores cujos clientes LangChain aceitam um 'http_client' httpx partilhado
+HTTP_CLIENT_PROVIDERS = {"openai", "groq", "deepseek", "xai"}
+
+# Provedores cujo endereço da API pode ser substituído (ex.: pelo servidor de testes da Batch API)
+BASE_URL_PROVIDERS = {"openai", "groq"}
+
+# Temperatura usada quando a entrada do LLM_CONFIG não define "temperature"
+DEFAULT_TEMPERATURE = 0.1
+
 class FixEncodingJsonOutputParser(JsonOutputParser):
     """
     Um parser que tenta corrigir problemas comuns de codificação (mojibake)
@@ -53,26 +71,34 @@ class FixEncodingJsonOutputParser(JsonOutputParser):
 def build_llm(
     provider: str,
     model: str,
-    temperature: float = 0.1,
-    structured_output_model: Optional[Type[BaseModel]] = None
+    temperature: float = DEFAULT_TEMPERATURE,
+    structured_output_model: Optional[Type[BaseModel]] = None,
+    http_client: Optional[Any] = None,
+    base_url: Optional[str] = None
 ) -> Runnable:
     """
     Constrói e retorna um objeto de LLM da LangChain com base no provedor.
     Tenta usar with_structured_output e, se falhar, usa um parser com correção de codificação.
+    Se `http_client` for fornecido, é usado pelos provedores em HTTP_CLIENT_PROVIDERS.
+    Se `base_url` for fornecido (provedores em BASE_URL_PROVIDERS), substitui o endereço da API.
     """
     provider = provider.lower()
     llm = None
+    client_kwargs = {"http_client": http_client} if http_client is not None and provider in HTTP_CLIENT_PROVIDERS else {}
+    if base_url:
+        if provider not in BASE_URL_PROVIDERS: raise ValueError(f"O provedor '{provider}' não aceita um 'base_url' personalizado.")
+        client_kwargs["base_url"] = base_url
     
     force_parser_fallback = ["xai", "maritaca"] 
     
     if provider == "openai":
         if not os.getenv("OPENAI_API_KEY"): raise ValueError("Chave de API OPENAI_API_KEY não encontrada no arquivo .env")
         if not ChatOpenAI: raise ImportError("langchain-openai não está instalado.")
-        llm = ChatOpenAI(model=model, temperature=temperature)
+        llm = ChatOpenAI(model=model, temperature=temperature, **client_kwargs)
     elif provider == "groq":
         if not os.getenv("GROQ_API_KEY"): raise ValueError("Chave de API GROQ_API_KEY não encontrada no arquivo .env")
         if not ChatGroq: raise ImportError("langchain-groq não está instalado.")
-        llm = ChatGroq(model=model, temperature=temperature)
+        llm = ChatGroq(model=model, temperature=temperature, **client_kwargs)
     elif provider == "anthropic":
         if not os.getenv("ANTHROPIC_API_KEY"): raise ValueError("Chave de API ANTHROPIC_API_KEY não encontrada no .env")
         if not ChatAnthropic: raise ImportError("langchain-anthropic não está instalado.")
@@ -84,11 +110,11 @@ def build_llm(
     elif provider == "deepseek":
         if not os.getenv("DEEPSEEK_API_KEY"): raise ValueError("Chave de API DEEPSEEK_API_KEY não encontrada no .env")
         if not ChatDeepSeek: raise ImportError("langchain-deepseek não está instalado.")
-        llm = ChatDeepSeek(model=model, temperature=temperature, api_key=os.getenv("DEEPSEEK_API_KEY"))
+        llm = ChatDeepSeek(model=model, temperature=temperature, api_key=os.getenv("DEEPSEEK_API_KEY"), **client_kwargs)
     elif provider == "xai":
         if not os.getenv("XAI_API_KEY"): raise ValueError("Chave de API XAI_API_KEY não encontrada no .env")
         if not ChatXAI: raise ImportError("langchain-xai não está instalado.")
-        llm = ChatXAI(model=model, temperature=temperature, api_key=os.getenv("XAI_API_KEY"))
+        llm = ChatXAI(model=model, temperature=temperature, api_key=os.getenv("XAI_API_KEY"), **client_kwargs)
     else:
         raise ValueError(f"Provedor '{provider}' não é suportado.")
 
@@ -109,4 +135,91 @@ def build_llm(
     if llm:
         return llm
     
-    raise RuntimeError("Falha fatal ao construir o LLM.")
\ No newline at end of file
+    raise RuntimeError("Falha fatal ao construir o LLM.")
+
+class LLMClientPool:
+    """
+    Pool de clientes LLM reutilizáveis.
+
+    Os runnables são guardados em cache pela chave (provedor, modelo, temperatura, schema de saída,
+    endereço da API),
+    de modo que agentes com a mesma configuração, em qualquer cenário, usam o mesmo objeto.
+    Cada provedor compatível recebe um único cliente httpx com conexões keep-alive, partilhado
+    por todos os seus modelos (ex.: os agentes OpenAI, o Juiz e o Analista).
+    """
+    def __init__(self, http_config: Optional[dict] = None):
+        self.http_config = {**HTTP_POOL_CONFIG, **(http_config or {})}
+        self._http_clients = {}
+        self._runnables = {}
+        self._lock = threading.RLock()
+
+    def http_client(self, provider: str) -> Optional[Any]:
+        """Devolve (criando se necessário) o cliente httpx partilhado do provedor."""
+        if provider not in HTTP_CLIENT_PROVIDERS or httpx is None:
+            return None
+        with self._lock:
+            if provider not in self._http_clients:
+                cfg = self.http_config
+                self._http_clients[provider] = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=cfg["max_connections"],
+                        max_keepalive_connections=cfg["max_keepalive_connections"],
+                        keepalive_expiry=cfg["keepalive_expiry"],
+                    ),
+                    timeout=cfg["timeout"],
+                    http2=cfg["http2"],
+                )
+            return self._http_clients[provider]
+
+    def get(
+        self,
+        provider: str,
+        model: str,
+        temperature: float = DEFAULT_TEMPERATURE,
+        structured_output_model: Optional[Type[BaseModel]] = None,
+        base_url: Optional[str] = None
+    ) -> Runnable:
+        """Devolve o runnable em cache para a configuração pedida, construindo-o na primeira vez."""
+        provider = provider.lower()
+        key = (provider, model, temperature, structured_output_model, base_url)
+        with self._lock:
+            if key not in self._runnables:
+                self._runnables[key] = build_llm(
+                    provider=provider,
+                    model=model,
+                    temperature=temperature,
+                    structured_output_model=structured_output_model,
+                    http_client=self.http_client(provider),
+                    base_url=base_url,
+                )
+            return self._runnables[key]
+
+    def close(self):
+        """Fecha todos os pools de conexão e esvazia o cache de runnables."""
+        with self._lock:
+            for client in self._http_clients.values():
+                client.close()
+            self._http_clients.clear()
+            self._runnables.clear()
+
+_default_pool = LLMClientPool()
+
+def get_llm(
+    provider: str,
+    model: str,
+    temperature: float = DEFAULT_TEMPERATURE,
+    structured_output_model: Optional[Type[BaseModel]] = None,
+    base_url: Optional[str] = None
+) -> Runnable:
+    """Equivalente a `build_llm`, mas reutiliza clientes e conexões através do pool global."""
+    return _default_pool.get(provider, model, temperature, structured_output_model, base_url)
+
+def get_http_client(provider: str) -> Optional[Any]:
+    """Devolve o cliente httpx partilhado do provedor no pool global (None se o provedor não o suportar)."""
+    return _default_pool.http_client(provider.lower())
+
+def close_llm_pools():
+    """Fecha as conexões HTTP do pool global. Chamado automaticamente à saída do processo."""
+    _default_pool.close()
+
+atexit.register(close_llm_pools)
@@ -0,0 +1,79 @@
+from functools import lru_cache
+from typing import Optional
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Codificações tiktoken das famílias de modelos da OpenAI (prefixo do nome do modelo -> codificação)
+TIKTOKEN_ENCODINGS = {
+    "gpt-5": "o200k_base",
+    "gpt-4.1": "o200k_base",
+    "gpt-4o": "o200k_base",
+    "o1": "o200k_base",
+    "o3": "o200k_base",
+    "o4": "o200k_base",
+    "gpt-4": "cl100k_base",
+    "gpt-3.5": "cl100k_base",
+}
+
+# Estimativa de caracteres por token, em texto em português, para as famílias sem
+# tokenizador local (a Sabiá tem um vocabulário próprio para o idioma)
+CHARS_PER_TOKEN = {
+    "sabia": 4.2,
+    "llama": 3.4,
+    "deepseek": 3.4,
+    "grok": 3.6,
+}
+DEFAULT_CHARS_PER_TOKEN = 3.4
+
+
+@lru_cache(maxsize=None)
+def _encoding_for(model: str):
+    if not tiktoken or not model:
+        return None
+    model = model.lower()
+    for prefix, encoding_name in TIKTOKEN_ENCODINGS.items():
+        if model.startswith(prefix):
+            try:
+                return tiktoken.get_encoding(encoding_name)
+            except Exception as e:
+                # O tiktoken descarrega as codificações na primeira utilização; sem rede, usa a estimativa
+                print(f"   ⚠️  Codificação '{encoding_name}' indisponível ({e.__class__.__name__}). A estimar os tokens de '{model}'.")
+                return None
+    return None
+
+
+def _chars_per_token(model: Optional[str]) -> float:
+    model = (model or "").lower()
+    for family, ratio in CHARS_PER_TOKEN.items():
+        if family in model:
+            return ratio
+    return DEFAULT_CHARS_PER_TOKEN
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    """
+    Conta localmente os tokens de um texto para a família do modelo indicado.
+
+    Usa o tokenizador exato (tiktoken) para os modelos da OpenAI e, para as restantes
+    famílias, uma estimativa pela razão média de caracteres por token.
+    """
+    if not text:
+        return 0
+    encoding = _encoding_for(model)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return max(1, round(len(text) / _chars_per_token(model)))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: Optional[str] = None) -> str:
+    """Corta um texto para que não ultrapasse `max_tokens` tokens do modelo indicado."""
+    if max_tokens <= 0:
+        return ""
+    encoding = _encoding_for(model)
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+    return text[: int(max_tokens * _chars_per_token(model))]
@@ -7,11 +7,14 @@ import os
 
 # Importando as nossas ferramentas
 from config.llm_config import LLM_CONFIG
-from core.llm_builder import build_llm
-from core.models import Decision, FinalResolution, DecisionValidationError
+from config.simulation_config import SIMULATION_CONFIG, BATCH_CONFIG
+from core.llm_builder import DEFAULT_TEMPERATURE, get_llm, close_llm_pools
+from core.models import Decision, DecisionValidationError
 from core.agent import StateAgent
 from core.judge import Judge
-from langchain_huggingface import HuggingFaceEmbeddings
+from core.convergence import ConvergenceDetector, STOP_MAX_ROUNDS
+from core.batching import BatchDecisionRunner
+from core.embeddings import build_embeddings
 
 def run_full_simulation():
     """
@@ -33,8 +36,16 @@ def run_full_simulation():
         print(f"❌ Erro ao carregar cenários: {e}")
         return
 
+    print("3. Criando o modelo de embedding compartilhado (pode demorar na primeira vez)...")
+    try:
+        embedding_model = build_embeddings()
+        print("   ✅ Modelo de embedding carregado.")
+    except Exception as e:
+        print(f"   ❌ Erro ao carregar modelo de embedding: {e}")
+        return
+
     try:
-        juiz = Judge(pdf_path="data/manual_ri.pdf")
+        juiz = Judge(pdf_path="data/manual_ri.pdf", embedding_model=embedding_model)
     except Exception as e:
         print(f"❌ Falha ao inicializar o Juiz. Erro: {e}")
         return
@@ -46,14 +57,6 @@ def run_full_simulation():
         print(f"❌ Falha ao inicializar o Módulo de Análise. Erro: {e}")
         return
 
-    print("3. Criando o modelo de embedding compartilhado (pode demorar na primeira vez)...")
-    try:
-        embedding_model = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-        print("   ✅ Modelo de embedding carregado.")
-    except Exception as e:
-        print(f"   ❌ Erro ao carregar modelo de embedding: {e}")
-        return
-
     agent_llm_configs = {k: v for k, v in LLM_CONFIG.items() if k != "juiz"}
     llm_keys_ordered = list(agent_llm_configs.keys())
     
@@ -82,40 +85,66 @@ def run_full_simulation():
             
             print(f"  - Preparando ator '{actor_name}' com o LLM '{llm_key}' ({config_llm['model']})")
             
-            agent_llm = build_llm(
+            agent_llm = get_llm(
                 provider=config_llm["provider"],
                 model=config_llm["model"],
-                structured_output_model=Decision
+                temperature=config_llm.get("temperature", DEFAULT_TEMPERATURE),
+                structured_output_model=Decision,
+                # Com o modo em lote ativo, os pedidos individuais (e a autocorreção) seguem
+                # para o mesmo endereço que os lotes, ex.: o servidor de testes
+                base_url=BATCH_CONFIG["base_urls"].get(config_llm["provider"].lower()) if BATCH_CONFIG["enabled"] else None
             )
             
             agents[actor_name] = StateAgent(
                 llm=agent_llm,
                 actor_data=actor_data,
                 role=current_scenario["role_assignment"][actor_name],
-                embedding_model=embedding_model
+                embedding_model=embedding_model,
+                model_name=config_llm["model"]
+            )
+
+        batch_runner = None
+        if BATCH_CONFIG["enabled"]:
+            batch_runner = BatchDecisionRunner(
+                agents, {name: agent_llm_configs[key] for name, key in current_llm_assignment.items()}
             )
 
         last_actions = {} 
         situation_summary = "Esta é a primeira rodada. O cenário acaba de começar."
         impact_analysis = "Nenhuma, esta é a primeira rodada."
         escalation_level = 0
-        total_rounds = 20
+        total_rounds = SIMULATION_CONFIG["total_rounds"]
+        convergence = ConvergenceDetector()
+        stop_reason = STOP_MAX_ROUNDS
+        rounds_played = 0
         for round_num in range(1, total_rounds + 1):
+            rounds_played = round_num
             print(f"\n--- Cenário {scenario_id} | Rodada {round_num}/{total_rounds} ---")
             
             round_decisions = {}
+            decide_kwargs = {
+                actor_name: dict(
+                    synopsis=current_scenario["synopsis"],
+                    situation_summary=situation_summary,
+                    round_number=round_num,
+                    last_action=last_actions.get(actor_name),
+                    impact_analysis=impact_analysis,
+                    escalation_level=escalation_level,
+                    total_rounds=total_rounds
+                )
+                for actor_name in agents
+            }
+            # No modo em lote, os agentes do mesmo modelo decidem juntos antes das avaliações do Juiz
+            batched_decisions = batch_runner.decide_round(decide_kwargs) if batch_runner else None
+
             for actor_name, agent in agents.items():
                 try:
-                    last_action_for_agent = last_actions.get(actor_name)
-
-                    decision = agent.decide(
-                        synopsis=current_scenario["synopsis"],
-                        situation_summary=situation_summary,
-                        round_number=round_num,
-                        last_action=last_action_for_agent,
-                        impact_analysis=impact_analysis,
-                        escalation_level=escalation_level
-                    )
+                    if batched_decisions is None:
+                        decision = agent.decide(**decide_kwargs[actor_name])
+                    else:
+                        decision = batched_decisions[actor_name]
+                        if isinstance(decision, Exception):
+                            raise decision
                     
                     verdict = juiz.evaluate(decision=decision)
                     
@@ -137,9 +166,13 @@ def run_full_simulation():
                         "action_primary": decision.action_primary,
                         "council_participation": decision.council_participation,
                         "council_action": decision.council_action,
+                        "escalation_level": escalation_level,
                         "judge_verdict": verdict.verdict,
                         "justification_text": decision.justification_text,
                         "judge_rationale": verdict.rationale,
+                        "judge_config_hash": juiz.config_hash,
+                        "prompt_tokens": agent.last_prompt_usage["total"],
+                        "prompt_token_usage": json.dumps(agent.last_prompt_usage, ensure_ascii=False),
                     }
                     scenario_results.append(result_entry)
                     
@@ -149,6 +182,8 @@ def run_full_simulation():
                     print(f"  ❌ Erro ao processar a decisão para '{actor_name}'. Erro: {e}")
                     scenario_results.append({"scenario_id": scenario_id, "round_number": round_num, "actor_name": actor_name, "error": str(e)})
 
+            # Nível de escalada desta rodada para o detetor de convergência (None = rodada sem análise)
+            analyzed_level = None
             if round_decisions:
                 try:
                     print("   -- Analisando o impacto da rodada...")
@@ -158,13 +193,24 @@ def run_full_simulation():
                     impact_analysis = analysis_result.impact_summary
                     escalation_level = analysis_result.escalation_level
                     print(f"   -- Análise: Impacto: '{impact_analysis}'. Novo Nível de Escalada: {escalation_level}")
+                    analyzed_level = escalation_level
                 except Exception as e:
                     print(f"   ⚠️ Erro na análise da rodada: {e}. A usar dados da rodada anterior.")
             else:
                 print("   -- Nenhuma decisão bem-sucedida na rodada para analisar.")
 
+            reason = convergence.update(round_decisions, analyzed_level)
+            if reason and round_num < total_rounds:
+                stop_reason = reason
+                print(f"   -- 🛑 Convergência detetada ({reason}). A terminar o cenário na rodada {round_num}/{total_rounds}.")
+                break
+
         if scenario_results:
             df_results = pd.DataFrame(scenario_results)
+            df_results["stop_reason"] = stop_reason
+            df_results["rounds_played"] = rounds_played
+            df_results["total_rounds"] = total_rounds
+            df_results["final_escalation_level"] = escalation_level
             df_results.to_csv(output_filename, index=False, encoding='utf-8-sig')
             print(f"\n✅ Resultados do Cenário {scenario_id} salvos em: '{output_filename}'")
         else:
@@ -173,4 +219,7 @@ def run_full_simulation():
     print(f"\n\n{'='*20} TODAS AS SIMULAÇÕES DISPONÍVEIS FORAM CONCLUÍDAS {'='*20}")
 
 if __name__ == "__main__":
-    run_full_simulation()
\ No newline at end of file
+    try:
+        run_full_simulation()
+    finally:
+        close_llm_pools()
\ No newline at end of file
@@ -0,0 +1,155 @@
+"""
+Reavalia com o Juiz atual os resultados já gravados, sem voltar a simular os cenários.
+
+Útil depois de alterar `data/manual_ri.pdf`, o `JUDGE_PROMPT` ou o modelo `juiz`.
+Cada configuração do Juiz tem um hash (`Judge.config_hash`); os novos vereditos são
+gravados nas colunas `judge_verdict__<hash>`, `judge_rationale__<hash>` e
+`judge_error__<hash>`, ao lado das colunas originais, para que possam ser comparados.
+
+Linhas cujo `judge_config_hash` já coincide com o hash atual não são reavaliadas
+(o veredito existente é copiado), e linhas que já têm um veredito nas novas colunas
+são saltadas, pelo que uma execução interrompida pode ser retomada.
+
+Uso:
+    python rejudge.py
+    python rejudge.py --max-concurrency 32 --pattern "resultados_SCN-0*.csv"
+"""
+import argparse
+import glob
+import os
+
+import pandas as pd
+from dotenv import load_dotenv
+from pydantic import ValidationError
+
+from core.embeddings import build_embeddings
+from core.judge import Judge
+from core.llm_builder import close_llm_pools
+from core.models import Decision
+
+
+def _optional(value):
+    return None if pd.isna(value) else value
+
+
+def _write_atomically(df: pd.DataFrame, path: str):
+    tmp_path = f"{path}.tmp"
+    df.to_csv(tmp_path, index=False, encoding="utf-8-sig")
+    os.replace(tmp_path, path)
+
+
+def rejudge_file(path: str, juiz: Judge, max_concurrency: int, chunk_size: int, dry_run: bool = False) -> dict:
+    """
+    Reavalia as decisões pendentes de um arquivo de resultados.
+
+    Returns:
+        dict: Contagens 'pending' (decisões por avaliar no início), 'evaluated', 'copied',
+        'skipped', 'errors' e 'changed' (vereditos diferentes do original).
+    """
+    suffix = f"__{juiz.config_hash}"
+    verdict_col, rationale_col, error_col = (f"judge_verdict{suffix}", f"judge_rationale{suffix}", f"judge_error{suffix}")
+
+    # As colunas novas são lidas como texto: se foram gravadas vazias (ex.: todas as avaliações
+    # falharam), o pandas inferiria float64 e recusaria os vereditos ao retomar
+    new_columns = (verdict_col, rationale_col, error_col)
+    df = pd.read_csv(path, encoding="utf-8-sig", dtype={column: "object" for column in new_columns})
+    for column in new_columns:
+        if column not in df.columns:
+            df[column] = pd.Series(dtype="object")
+    stats = {"pending": 0, "evaluated": 0, "copied": 0, "skipped": 0, "errors": 0, "changed": 0}
+
+    has_decision = df["action_primary"].notna() if "action_primary" in df.columns else pd.Series(False, index=df.index)
+    already_done = df[verdict_col].notna()
+    stats["skipped"] = int((has_decision & already_done).sum())
+
+    # Vereditos produzidos pela configuração atual são copiados sem chamar o LLM
+    if "judge_config_hash" in df.columns:
+        current = has_decision & ~already_done & (df["judge_config_hash"] == juiz.config_hash)
+        df.loc[current, verdict_col] = df.loc[current, "judge_verdict"]
+        df.loc[current, rationale_col] = df.loc[current, "judge_rationale"]
+        stats["copied"] = int(current.sum())
+
+    pending = df.index[has_decision & df[verdict_col].isna()]
+    stats["pending"] = len(pending)
+    if dry_run:
+        return stats
+    if len(pending) == 0:
+        # Mesmo sem avaliações pendentes, os vereditos copiados têm de ser gravados
+        if stats["copied"]:
+            _write_atomically(df, path)
+        return stats
+
+    for start in range(0, len(pending), chunk_size):
+        indexes, decisions = [], []
+        for idx in pending[start:start + chunk_size]:
+            row = df.loc[idx]
+            try:
+                decisions.append(Decision(
+                    action_primary=row["action_primary"],
+                    justification_text=row["justification_text"],
+                    council_participation=_optional(row.get("council_participation")),
+                    council_action=_optional(row.get("council_action")),
+                ))
+                indexes.append(idx)
+            except ValidationError as e:
+                df.at[idx, error_col] = f"Decisão inválida: {e}"
+                stats["errors"] += 1
+
+        verdicts = juiz.evaluate_many(decisions, max_concurrency=max_concurrency)
+        for idx, verdict in zip(indexes, verdicts):
+            if isinstance(verdict, Exception):
+                df.at[idx, error_col] = str(verdict)
+                stats["errors"] += 1
+                continue
+            df.at[idx, verdict_col] = verdict.verdict
+            df.at[idx, rationale_col] = verdict.rationale
+            df.at[idx, error_col] = None
+            stats["evaluated"] += 1
+            if "judge_verdict" in df.columns and df.at[idx, "judge_verdict"] != verdict.verdict:
+                stats["changed"] += 1
+
+        # Grava após cada bloco para que uma interrupção não perca o trabalho feito
+        _write_atomically(df, path)
+        print(f"   - {min(start + chunk_size, len(pending))}/{len(pending)} decisões reavaliadas.")
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--results-dir", default="outputs", help="Pasta com os CSVs de resultados.")
+    parser.add_argument("--pattern", default="resultados_*.csv", help="Padrão glob dos arquivos a reavaliar.")
+    parser.add_argument("--pdf-path", default="data/manual_ri.pdf", help="Manual de RI usado pelo Juiz.")
+    parser.add_argument("--max-concurrency", type=int, default=16, help="Avaliações simultâneas.")
+    parser.add_argument("--chunk-size", type=int, default=200, help="Decisões avaliadas entre gravações do arquivo.")
+    parser.add_argument("--dry-run", action="store_true", help="Apenas conta as decisões pendentes.")
+    args = parser.parse_args()
+
+    load_dotenv()
+    paths = sorted(glob.glob(os.path.join(args.results_dir, "**", args.pattern), recursive=True))
+    if not paths:
+        print(f"❌ Nenhum arquivo de resultados encontrado em '{args.results_dir}'.")
+        return
+
+    juiz = Judge(pdf_path=args.pdf_path, embedding_model=build_embeddings())
+    print(f"\n⚖️  Configuração atual do Juiz: {juiz.config_hash}. {len(paths)} arquivos a verificar.")
+
+    totals = {}
+    for path in paths:
+        print(f"\n📄 {path}")
+        stats = rejudge_file(path, juiz, args.max_concurrency, args.chunk_size, dry_run=args.dry_run)
+        print(f"   -> {stats}")
+        for key, value in stats.items():
+            totals[key] = totals.get(key, 0) + value
+
+    print(f"\n✅ Reavaliação concluída: {totals}")
+    if totals.get("evaluated"):
+        print(f"   Vereditos alterados em relação ao original: {totals['changed']}/{totals['evaluated']} "
+              f"({totals['changed'] / totals['evaluated']:.1%}).")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    finally:
+        close_llm_pools()
@@ -0,0 +1,130 @@
+import os
+import sys
+from typing import get_args
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.analytics import ResultsAnalytics, DIMENSIONS
+from core.models import MILITARY_ACTIONS, DIPLOMATIC_ACTIONS
+
+ACTIONS = list(get_args(MILITARY_ACTIONS)) + list(get_args(DIPLOMATIC_ACTIONS))
+VERDICTS = ["Neorrealismo", "Neoliberalismo", "Construtivismo"]
+
+
+def _write_run(path, seed: int, rounds: int = 6):
+    """Grava um arquivo de resultados sintético com 3 atores (modelos, papéis e cenário variam com a semente)."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for round_number in range(1, rounds + 1):
+        for actor in range(3):
+            rows.append({
+                "scenario_id": f"S{seed % 2}",
+                "scenario_type": ["crise", "disputa"][seed % 2],
+                "round_number": round_number,
+                "actor_name": f"Ator {actor}",
+                "actor_role": ["agressor", "mediador", "aliado"][actor],
+                "llm_model": ["modelo-a", "modelo-b"][(actor + seed) % 2],
+                "action_primary": rng.choice(ACTIONS),
+                "council_participation": rng.choice(["participar", "abster-se"]),
+                "judge_verdict": rng.choice(VERDICTS),
+                "escalation_level": int(rng.integers(0, 6)),
+            })
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pd.DataFrame(rows).to_csv(path, index=False, encoding="utf-8-sig")
+    # Garante uma assinatura (mtime, tamanho) diferente mesmo em sistemas com mtime grosseiro
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + seed * 1_000_000_000))
+
+
+def _snapshot(analytics: ResultsAnalytics) -> dict:
+    by = list(DIMENSIONS)
+    return {
+        "actions": analytics.action_distribution(by),
+        "transitions": analytics.transition_matrix(normalize=False),
+        "verdicts": analytics.verdict_distribution(by),
+        "council": analytics.council_participation(by),
+        "trajectories": analytics.escalation_trajectories(),
+        "runs": analytics.run_summary().sort_index(),
+    }
+
+
+def _assert_same(incremental: ResultsAnalytics, results_dir):
+    fresh = _snapshot(ResultsAnalytics(str(results_dir), cache_dir=""))
+    for name, table in _snapshot(incremental).items():
+        pd.testing.assert_frame_equal(table, fresh[name], check_dtype=False, obj=name)
+
+
+def test_refresh_matches_fresh_instance(tmp_path):
+    results = tmp_path / "outputs"
+    _write_run(str(results / "r1" / "resultados_1.csv"), seed=1)
+    _write_run(str(results / "r2" / "resultados_2.csv"), seed=2)
+    analytics = ResultsAnalytics(str(results))
+    _assert_same(analytics, results)
+
+    # Arquivo novo: somado aos agregados existentes
+    new_path = str(results / "r3" / "resultados_3.csv")
+    _write_run(new_path, seed=3)
+    assert analytics.refresh() == {"added": [new_path], "changed": [], "removed": []}
+    _assert_same(analytics, results)
+
+    # Arquivo alterado: os totais são reconstruídos a partir dos parciais
+    changed_path = str(results / "r1" / "resultados_1.csv")
+    _write_run(changed_path, seed=11, rounds=4)
+    assert analytics.refresh() == {"added": [], "changed": [changed_path], "removed": []}
+    _assert_same(analytics, results)
+
+    # Arquivo removido
+    removed_path = str(results / "r2" / "resultados_2.csv")
+    os.remove(removed_path)
+    assert analytics.refresh() == {"added": [], "changed": [], "removed": [removed_path]}
+    _assert_same(analytics, results)
+    assert len(analytics.replicates) == 2
+
+
+def test_stale_disk_cache_is_recomputed(tmp_path):
+    results = tmp_path / "outputs"
+    path = str(results / "r1" / "resultados_1.csv")
+    _write_run(path, seed=1)
+    _write_run(str(results / "r2" / "resultados_2.csv"), seed=2)
+    ResultsAnalytics(str(results)).refresh()
+    assert os.listdir(results / ".analytics_cache")
+
+    # O CSV muda depois de o cache em disco ter sido gravado: a assinatura deixa de coincidir
+    _write_run(path, seed=5, rounds=3)
+    _assert_same(ResultsAnalytics(str(results)), results)
+
+
+def test_bootstrap_ci_with_fixed_seed(tmp_path):
+    results = tmp_path / "outputs"
+    for seed in range(1, 7):
+        _write_run(str(results / f"r{seed}" / f"resultados_{seed}.csv"), seed=seed)
+    analytics = ResultsAnalytics(str(results), cache_dir="")
+
+    ci = analytics.bootstrap_ci("council_participation", by=("llm_model",), n_boot=500, seed=7)
+    again = analytics.bootstrap_ci("council_participation", by=("llm_model",), n_boot=500, seed=7)
+    pd.testing.assert_frame_equal(ci, again)
+
+    rates = analytics.council_participation(("llm_model",))["participation_rate"]
+    assert np.allclose(ci["estimate"].to_numpy(), rates.reindex(ci.index).to_numpy())
+    assert (ci["ci_low"] <= ci["estimate"]).all() and (ci["estimate"] <= ci["ci_high"]).all()
+    assert (ci["n_replicates"] == 6).all()
+
+    verdicts = analytics.bootstrap_ci("verdict_share", by=("scenario_type",), verdict="Neorrealismo", n_boot=200, seed=7)
+    assert set(verdicts.index) == {"crise", "disputa"}
+    assert (verdicts["n_replicates"] == 3).all()
+    with pytest.raises(ValueError):
+        analytics.bootstrap_ci("verdict_share")
+
+
+def test_bootstrap_ci_is_degenerate_for_identical_replicates(tmp_path):
+    results = tmp_path / "outputs"
+    for replicate in range(4):
+        _write_run(str(results / f"r{replicate}" / "resultados_1.csv"), seed=2)
+    ci = ResultsAnalytics(str(results), cache_dir="").bootstrap_ci(by=("scenario_type",), n_boot=100, seed=0)
+    row = ci.iloc[0]
+    assert row["ci_low"] == pytest.approx(row["estimate"]) and row["ci_high"] == pytest.approx(row["estimate"])
@@ -0,0 +1,115 @@
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_openai")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_community.embeddings import DeterministicFakeEmbedding
+
+import batch_stub_server
+from core.agent import StateAgent
+from core.batching import BatchDecisionRunner
+from core.llm_builder import get_llm
+from core.models import Decision, DecisionValidationError
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """Inicia o servidor de testes numa porta livre e devolve (estado, endereço base)."""
+    monkeypatch.setenv("OPENAI_API_KEY", "chave-de-teste")
+
+    def start(**options):
+        server = batch_stub_server.serve(port=0, **options)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server.RequestHandlerClass.state, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    servers = []
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _runner(base_url: str, models: list, **config):
+    with open(os.path.join(ROOT, "data", "cenarios.json"), encoding="utf-8") as f:
+        scenario = json.load(f)["scenarios"][0]
+    embeddings = DeterministicFakeEmbedding(size=16)
+
+    agents, assignment = {}, {}
+    for actor, model in zip(scenario["actors"], models):
+        assignment[actor["name"]] = {"provider": "openai", "model": model}
+        llm = get_llm("openai", model, structured_output_model=Decision, base_url=base_url)
+        agents[actor["name"]] = StateAgent(
+            llm, actor, scenario["role_assignment"][actor["name"]], embeddings, model_name=model
+        )
+
+    runner = BatchDecisionRunner(agents, assignment, {
+        "base_urls": {"openai": base_url}, "poll_interval": 0.05, "max_poll_interval": 0.2, **config,
+    })
+    individual = []
+    decide_individually = runner._decide_individually
+    runner._decide_individually = lambda name, kwargs: individual.append(name) or decide_individually(name, kwargs)
+
+    decide_kwargs = {
+        name: dict(synopsis=scenario["synopsis"], situation_summary="Início.", round_number=1, last_action=None,
+                   impact_analysis="Nenhuma.", escalation_level=0, total_rounds=5)
+        for name in agents
+    }
+    return runner, decide_kwargs, individual
+
+
+def test_all_groups_batched(stub):
+    state, base_url = stub()
+    runner, decide_kwargs, individual = _runner(base_url, ["gpt-4o-mini"] * 3 + ["gpt-4o"] * 2)
+
+    decisions = runner.decide_round(decide_kwargs)
+
+    assert list(decisions) == list(decide_kwargs)
+    assert all(isinstance(d, Decision) for d in decisions.values())
+    assert len(state.batches) == 2
+    assert individual == [] and state.chat_requests == 0
+
+
+def test_invalid_batch_responses_are_self_corrected_through_stub(stub):
+    state, base_url = stub(invalid_rate=1.0, chat_invalid_rate=0.0)
+    runner, decide_kwargs, individual = _runner(base_url, ["gpt-4o-mini"] * 5)
+
+    decisions = runner.decide_round(decide_kwargs)
+
+    assert all(isinstance(d, Decision) for d in decisions.values())
+    # Uma chamada de autocorreção por agente, feita ao servidor de testes e não ao provedor real
+    assert individual == [] and state.chat_requests == len(decide_kwargs)
+
+
+def test_failed_self_correction_is_reported(stub):
+    state, base_url = stub(invalid_rate=1.0)
+    runner, decide_kwargs, _ = _runner(base_url, ["gpt-4o-mini"] * 2)
+
+    decisions = runner.decide_round({name: decide_kwargs[name] for name in list(decide_kwargs)[:2]})
+
+    assert all(isinstance(d, DecisionValidationError) for d in decisions.values())
+
+
+def test_timeout_keeps_partial_output(stub):
+    # 5 pedidos processados ao longo de 4s (um a cada 0.8s): ao fim de 2s, 2 respostas estão prontas
+    state, base_url = stub(batch_delay=4.0)
+    runner, decide_kwargs, individual = _runner(base_url, ["gpt-4o-mini"] * 5, timeout=2.0)
+
+    decisions = runner.decide_round(decide_kwargs)
+
+    assert all(isinstance(d, Decision) for d in decisions.values())
+    [batch] = state.batches.values()
+    assert batch["status"] == "cancelled"
+    assert 0 < len(individual) < len(decide_kwargs)
+    assert len(individual) + batch["request_counts"]["completed"] == len(decide_kwargs)
+    assert state.chat_requests == len(individual)
@@ -0,0 +1,24 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.convergence import ConvergenceDetector, STOP_ABSORBING_ESCALATION
+
+CONFIG = {"enabled": True, "min_rounds": 5, "absorbing_rounds": 4, "distribution_threshold": 0.1}
+
+
+def test_empty_rounds_never_converge():
+    detector = ConvergenceDetector(CONFIG)
+    assert [detector.update({}, 0) for _ in range(10)] == [None] * 10
+
+
+def test_failed_analysis_never_converges():
+    detector = ConvergenceDetector(CONFIG)
+    assert [detector.update({"A": "x"}, None) for _ in range(10)] == [None] * 10
+
+
+def test_gap_resets_absorbing_streak():
+    detector = ConvergenceDetector({**CONFIG, "repeat_rounds": 0, "distribution_threshold": None})
+    reasons = [detector.update({"A": "x" if r % 2 else "w"}, None if r == 5 else 0) for r in range(1, 10)]
+    assert reasons == [None] * 8 + [STOP_ABSORBING_ESCALATION]
@@ -0,0 +1,73 @@
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_community")
+pytest.importorskip("dotenv")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_community.embeddings import DeterministicFakeEmbedding
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+from core.judge import Judge, format_docs
+from core.tokens import count_tokens
+from config.rag_config import JUDGE_RETRIEVAL_CONFIG
+
+MODEL = "gpt-4o-mini"
+JUSTIFICATION = "A expulsão protege a nossa segurança e sinaliza firmeza aos aliados regionais."
+
+
+@pytest.fixture(scope="module")
+def pages():
+    sentences = [
+        f"O Estado {i} procura maximizar a sua segurança relativa num sistema anárquico, "
+        f"cooperando apenas quando as instituições reduzem os custos de transação ({i % 7})."
+        for i in range(2500)
+    ]
+    text = " ".join(sentences)
+    return [Document(page_content=text[i:i + 3000], metadata={"source": "manual.pdf", "page": i // 3000})
+            for i in range(0, len(text), 3000)]
+
+
+def _judge(pages, embeddings, **overrides) -> Judge:
+    """Juiz montado sem PDF nem LLM, apenas com o pipeline de recuperação."""
+    judge = Judge.__new__(Judge)
+    judge.retrieval_config = {**JUDGE_RETRIEVAL_CONFIG, **overrides}
+    judge.model_name = MODEL
+    cfg = judge.retrieval_config
+    splits = RecursiveCharacterTextSplitter(
+        chunk_size=cfg["chunk_size"], chunk_overlap=cfg["chunk_overlap"], add_start_index=True
+    ).split_documents(pages)
+    judge.vectorstore = judge._build_vectorstore(splits, embeddings)
+    judge.action_passages = judge._precompute_action_passages(embeddings)
+    return judge
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw"])
+def test_default_context_is_smaller_than_original_retrieval(pages, index_type):
+    embeddings = DeterministicFakeEmbedding(size=32)
+
+    # Recuperação original: 4 fragmentos de 1000 caracteres a partir da ação e da justificativa
+    splits = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200).split_documents(pages)
+    retriever = FAISS.from_documents(splits, embeddings).as_retriever(search_kwargs={"k": 4})
+    baseline = format_docs(retriever.invoke(f"expulsar missões diplomáticas {JUSTIFICATION}"))
+
+    judge = _judge(pages, embeddings, index_type=index_type)
+    context = judge._retrieve_context({"action": "expulsar missões diplomáticas", "justification": JUSTIFICATION})
+
+    baseline_tokens, context_tokens = count_tokens(baseline, MODEL), count_tokens(context, MODEL)
+    assert context_tokens <= JUDGE_RETRIEVAL_CONFIG["context_token_budget"]
+    assert context_tokens <= 0.6 * baseline_tokens
+    # O trecho da ação e pelo menos um trecho da justificativa chegam ao prompt
+    assert context.count("\n\n---\n\n") >= 1
+
+
+def test_budget_truncates_single_passage(pages):
+    judge = _judge(pages, DeterministicFakeEmbedding(size=32), context_token_budget=50)
+    context = judge._retrieve_context({"action": "expulsar missões diplomáticas", "justification": JUSTIFICATION})
+    assert 0 < count_tokens(context, MODEL) <= 50
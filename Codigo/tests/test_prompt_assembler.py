@@ -0,0 +1,115 @@
+import json
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_community")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.agent import PromptAssembler
+from core.models import Decision
+
+# Modelo sem tokenizador local: contagem determinística por caracteres, sem acesso à rede
+MODEL = "sabia-3.1"
+
+MEMORIES = [
+    f"Na rodada {i}, a minha decisão foi reforçar a fronteira porque o vizinho mobilizou tropas ({'x' * 120})."
+    for i in range(1, 13)
+]
+EVENTS = "; ".join(f"Estado {i} escolheu 'realização de exercícios militares dissuasórios'" for i in range(1, 9))
+
+
+def _variables() -> dict:
+    return {
+        "actor_name": "Potência Alfa",
+        "objectives": "Manter a influência regional.",
+        "synopsis": "Crise na fronteira norte.",
+        "actor_role": "agressor",
+        "ideological_profile": "Realista.",
+        "historical_context": "Contexto histórico longo. " * 30,
+        "internal_context": "Pressão interna elevada. " * 30,
+        "capabilities": "Drones e artilharia. " * 30,
+        "red_lines": "Nenhum ataque nuclear.",
+        "situation_summary": EVENTS,
+        "impact_analysis": "A escalada aumentou na região. " * 20,
+        "escalation_level": 2,
+        "round_number": 5,
+        "total_rounds": 20,
+        "last_action": "reforço de guarnições de fronteira",
+        "schema": json.dumps(Decision.model_json_schema(), ensure_ascii=False, indent=2),
+    }
+
+
+def _assemble(budget):
+    return PromptAssembler(model=MODEL, context_budget=budget).assemble(_variables(), MEMORIES)
+
+
+@pytest.fixture(scope="module")
+def full():
+    """Relatório sem orçamento e tamanho do schema compactado."""
+    _, report = _assemble(None)
+    compact = json.dumps(Decision.model_json_schema(), ensure_ascii=False, separators=(",", ":"))
+    saving = report["sections"]["schema"] - PromptAssembler(model=MODEL)._count(compact)
+    return report, saving
+
+
+def test_no_budget_keeps_everything(full):
+    report, _ = full
+    assert report["reductions"] == [] and not report["over_budget"]
+    assert report["total"] == sum(report["sections"].values())
+
+
+def test_schema_is_compacted_first(full):
+    report, saving = full
+    variables, reduced = _assemble(report["total"] - saving // 2)
+
+    assert reduced["reductions"] == ["schema"]
+    assert json.loads(variables["schema"]) == Decision.model_json_schema()
+    assert variables["history"] == "\n".join(MEMORIES)
+    assert reduced["total"] <= reduced["budget"]
+
+
+def test_least_relevant_memories_are_dropped_next(full):
+    report, saving = full
+    variables, reduced = _assemble(report["total"] - saving - report["sections"]["history"] // 2)
+
+    assert reduced["reductions"] == ["schema", "history"]
+    kept = variables["history"].split("\n")
+    assert 0 < len(kept) < len(MEMORIES) and kept == MEMORIES[:len(kept)]
+    assert variables["situation_summary"] == EVENTS
+    assert reduced["total"] <= reduced["budget"]
+
+
+def test_situation_summary_keeps_leading_actions(full):
+    report, saving = full
+    sections = report["sections"]
+    budget = report["total"] - saving - sections["history"] - sections["situation_summary"] // 2
+    variables, reduced = _assemble(budget)
+
+    assert reduced["reductions"][:3] == ["schema", "history", "situation_summary"]
+    summary = variables["situation_summary"]
+    entries = EVENTS.split("; ")
+    kept = summary.split(" (+")[0].split("; ")
+    assert kept == entries[:len(kept)] and len(kept) < len(entries)
+    assert summary.endswith(f"(+{len(entries) - len(kept)} ações omitidas)")
+    assert reduced["total"] <= reduced["budget"] and not reduced["over_budget"]
+
+
+@pytest.mark.parametrize("fraction", [0.8, 0.6, 0.45])
+def test_reachable_budgets_are_respected(full, fraction):
+    report, _ = full
+    _, reduced = _assemble(int(report["total"] * fraction))
+    assert reduced["total"] <= reduced["budget"] and not reduced["over_budget"]
+
+
+def test_unreachable_budget_is_flagged(full, capsys):
+    report, _ = full
+    variables, reduced = _assemble(report["sections"]["template"] // 2)
+
+    assert reduced["over_budget"] and reduced["total"] > reduced["budget"]
+    assert reduced["reductions"] == PromptAssembler.REDUCTION_ORDER
+    assert variables["history"] == PromptAssembler.EMPTY_HISTORY
+    assert "mesmo após todas as reduções" in capsys.readouterr().out
@@ -0,0 +1,91 @@
+import os
+import sys
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("langchain_community")
+pytest.importorskip("dotenv")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rejudge
+from core.models import Verdict
+
+
+class FakeJudge:
+    """Juiz de teste: falha todas as avaliações enquanto `failing` for True."""
+    config_hash = "abc123"
+
+    def __init__(self):
+        self.failing = True
+
+    def evaluate_many(self, decisions, max_concurrency):
+        if self.failing:
+            return [RuntimeError("rate limit") for _ in decisions]
+        return [Verdict(verdict="Construtivismo", rationale="Justificativa do juiz de teste.") for _ in decisions]
+
+
+def _write_results(path, with_hash_column):
+    row = {
+        "action_primary": "expulsar missões diplomáticas",
+        "justification_text": "Uma justificativa suficientemente longa.",
+        "council_participation": None,
+        "council_action": None,
+        "judge_verdict": "Neorrealismo",
+        "judge_rationale": "Racional original do juiz.",
+    }
+    if with_hash_column:
+        row["judge_config_hash"] = "old"
+    pd.DataFrame([row, dict(row)]).to_csv(path, index=False, encoding="utf-8-sig")
+
+
+@pytest.mark.parametrize("with_hash_column", [True, False])
+def test_rerun_after_all_evaluations_failed(tmp_path, with_hash_column):
+    path = tmp_path / "resultados_T.csv"
+    _write_results(path, with_hash_column)
+    judge = FakeJudge()
+
+    first = rejudge.rejudge_file(str(path), judge, max_concurrency=2, chunk_size=10)
+    assert first["errors"] == 2 and first["evaluated"] == 0
+
+    judge.failing = False
+    second = rejudge.rejudge_file(str(path), judge, max_concurrency=2, chunk_size=10)
+    assert second["evaluated"] == 2 and second["errors"] == 0
+
+    # Depois de uma execução sem erros, a coluna de erros fica vazia e a retoma continua a funcionar
+    third = rejudge.rejudge_file(str(path), judge, max_concurrency=2, chunk_size=10)
+    assert third["skipped"] == 2 and third["evaluated"] == 0
+
+    df = pd.read_csv(path, encoding="utf-8-sig")
+    assert list(df["judge_verdict__abc123"]) == ["Construtivismo", "Construtivismo"]
+
+
+def test_rerun_copies_verdicts_of_current_config(tmp_path):
+    path = tmp_path / "resultados_T.csv"
+    _write_results(path, with_hash_column=True)
+    df = pd.read_csv(path, encoding="utf-8-sig")
+    df["judge_config_hash"] = FakeJudge.config_hash
+    df["judge_verdict__abc123"] = None
+    df.to_csv(path, index=False, encoding="utf-8-sig")
+
+    stats = rejudge.rejudge_file(str(path), FakeJudge(), max_concurrency=2, chunk_size=10)
+    assert stats["copied"] == 2 and stats["evaluated"] == 0 and stats["pending"] == 0
+
+    df = pd.read_csv(path, encoding="utf-8-sig")
+    assert list(df["judge_verdict__abc123"]) == ["Neorrealismo", "Neorrealismo"]
+    assert list(df["judge_rationale__abc123"]) == ["Racional original do juiz.", "Racional original do juiz."]
+
+    # Os vereditos copiados ficam gravados: a execução seguinte não tem nada a copiar
+    again = rejudge.rejudge_file(str(path), FakeJudge(), max_concurrency=2, chunk_size=10)
+    assert again["copied"] == 0 and again["skipped"] == 2
+
+
+def test_dry_run_does_not_write(tmp_path):
+    path = tmp_path / "resultados_T.csv"
+    _write_results(path, with_hash_column=True)
+    before = path.read_bytes()
+
+    stats = rejudge.rejudge_file(str(path), FakeJudge(), max_concurrency=2, chunk_size=10, dry_run=True)
+    assert stats["pending"] == 2 and set(stats) == {"pending", "evaluated", "copied", "skipped", "errors", "changed"}
+    assert path.read_bytes() == before